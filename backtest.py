@@ -0,0 +1,315 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from main import (
+    PAIRS, INTERVAL, ACCOUNT_BALANCE, STOP_LOSS_PIPS, TAKE_PROFIT_PIPS, SURE_SHOT_MIN_STRATEGIES,
+    RISK_MODE, RISK_MODES, ATR_LENGTH, ATR_SL_MULTIPLIER, ATR_TP_MULTIPLIER, MIN_STOP_PIPS,
+    RSI_BUY_LEVEL, RSI_SELL_LEVEL, BB_LENGTH, BB_STD, FIB_BUY_LEVEL, FIB_SELL_LEVEL, RANGE_ZONE,
+    STRATEGY_REGISTRY, Indicators, calculate_lot_size, read_bar_file, find_bar_file
+)
+
+DEFAULT_PARAMS = {
+    "rsi_buy": RSI_BUY_LEVEL,
+    "rsi_sell": RSI_SELL_LEVEL,
+    "bb_length": BB_LENGTH,
+    "bb_std": BB_STD,
+    "fib_buy": FIB_BUY_LEVEL,
+    "fib_sell": FIB_SELL_LEVEL,
+    "range_zone": RANGE_ZONE,
+    "min_strategies": SURE_SHOT_MIN_STRATEGIES,
+    "stop_loss_pips": STOP_LOSS_PIPS,
+    "take_profit_pips": TAKE_PROFIT_PIPS
+}
+
+def ema_rsi_rule(ind, params=DEFAULT_PARAMS):
+    ema50 = ind.get("ema", 50)
+    ema200 = ind.get("ema", 200)
+    rsi = ind.get("rsi", 14)
+    
+    buy = (ema50 > ema200) & (rsi > params["rsi_buy"])
+    sell = (ema50 < ema200) & (rsi < params["rsi_sell"])
+    return buy, sell & ~buy
+
+def breakout_rule(ind, params=DEFAULT_PARAMS):
+    close = ind.get("close")
+    prev_close = close.shift(1)
+    bb_upper = ind.get("bb_upper", params["bb_length"], params["bb_std"])
+    bb_lower = ind.get("bb_lower", params["bb_length"], params["bb_std"])
+    atr = ind.get("atr", ATR_LENGTH)
+    
+    buy = (prev_close < bb_upper) & (close >= bb_upper) & (atr > 0)
+    sell = (prev_close > bb_lower) & (close <= bb_lower) & (atr > 0)
+    return buy, sell & ~buy
+
+def ma_crossover_rule(ind, params=DEFAULT_PARAMS):
+    sma20 = ind.get("sma", 20)
+    sma50 = ind.get("sma", 50)
+    
+    buy = (sma20.shift(1) <= sma50.shift(1)) & (sma20 > sma50)
+    sell = (sma20.shift(1) >= sma50.shift(1)) & (sma20 < sma50)
+    return buy, sell & ~buy
+
+def fibonacci_rule(ind, params=DEFAULT_PARAMS):
+    high_14 = ind.get("highest", 14)
+    low_14 = ind.get("lowest", 14)
+    close = ind.get("close")
+    
+    diff = high_14 - low_14
+    fib_sell = high_14 - (diff * params["fib_sell"])
+    fib_buy = high_14 - (diff * params["fib_buy"])
+    
+    buy = (close <= fib_buy) & (close > low_14)
+    sell = close >= fib_sell
+    return buy, sell & ~buy
+
+def price_action_rule(ind, params=DEFAULT_PARAMS):
+    open_ = ind.get("open")
+    close = ind.get("close")
+    prev_high = ind.get("high").shift(1)
+    prev_low = ind.get("low").shift(1)
+    strong_body = (close - open_).abs() > ind.get("atr", ATR_LENGTH) * 0.5
+    
+    buy = (close > prev_high) & (open_ < prev_low) & strong_body
+    sell = (close < prev_low) & (open_ > prev_high) & strong_body
+    return buy, sell & ~buy
+
+def range_trading_rule(ind, params=DEFAULT_PARAMS):
+    high_20 = ind.get("highest", 20)
+    low_20 = ind.get("lowest", 20)
+    close = ind.get("close")
+    
+    range_size = high_20 - low_20
+    quiet = ind.get("atr", ATR_LENGTH) < range_size * 0.3
+    
+    buy = (close <= low_20 + (range_size * params["range_zone"])) & quiet
+    sell = (close >= high_20 - (range_size * params["range_zone"])) & quiet
+    return buy, sell & ~buy
+
+def pullback_rule(ind, params=DEFAULT_PARAMS):
+    ema20 = ind.get("ema", 20)
+    close = ind.get("close")
+    rsi = ind.get("rsi", 14)
+    
+    buy = (ema20 > ema20.shift(9)) & (close <= ema20 * 1.005) & (rsi < 50)
+    sell = (ema20 < ema20.shift(9)) & (close >= ema20 * 0.995) & (rsi > 50)
+    return buy, sell & ~buy
+
+VECTOR_RULES = {
+    "EMA_RSI": ema_rsi_rule,
+    "BREAKOUT": breakout_rule,
+    "MA_CROSSOVER": ma_crossover_rule,
+    "FIBONACCI": fibonacci_rule,
+    "PRICE_ACTION": price_action_rule,
+    "RANGE_TRADING": range_trading_rule,
+    "PULLBACK": pullback_rule
+}
+STRATEGY_RULES = {strategy_type: (registered[0], VECTOR_RULES[strategy_type]) for strategy_type, registered in STRATEGY_REGISTRY.items()}
+
+SURE_SHOT = "SURE_SHOT"
+
+def sure_shot_rule(ind, params=DEFAULT_PARAMS):
+    buy_votes = 0
+    sell_votes = 0
+    for strategy_name, rule in STRATEGY_RULES.values():
+        buy, sell = rule(ind, params)
+        buy_votes = buy_votes + buy.astype(int)
+        sell_votes = sell_votes + sell.astype(int)
+
+    buy = buy_votes >= params["min_strategies"]
+    sell = sell_votes >= params["min_strategies"]
+    return buy, sell & ~buy
+
+def strategy_rule(strategy_type):
+    if strategy_type == SURE_SHOT:
+        return "Sure Shot", sure_shot_rule
+    return STRATEGY_RULES[strategy_type]
+
+def first_crossing(values, thresholds, above):
+    n = len(values)
+    levels = [values]
+    span = 1
+    while span * 2 <= n:
+        prev = levels[-1]
+        levels.append(np.maximum(prev[:-span], prev[span:]) if above else np.minimum(prev[:-span], prev[span:]))
+        span *= 2
+    
+    pos = np.arange(1, n + 1)
+    for level in range(len(levels) - 1, -1, -1):
+        span = 1 << level
+        in_range = pos + span <= n
+        block = levels[level][np.where(in_range, pos, 0)]
+        missed = block < thresholds if above else block > thresholds
+        pos = np.where(in_range & missed, pos + span, pos)
+    
+    found = pos < n
+    reached = values[np.where(found, pos, 0)]
+    found &= reached >= thresholds if above else reached <= thresholds
+    return np.where(found, pos, n)
+
+def atr_exit_pips(ind, pip_size):
+    atr = ind.get("atr", ATR_LENGTH).to_numpy(dtype=float)
+    valid = atr > 0
+    stop_pips = np.where(valid, np.maximum(MIN_STOP_PIPS, np.round(atr * ATR_SL_MULTIPLIER / pip_size, 1)), STOP_LOSS_PIPS)
+    take_pips = np.where(valid, np.round(stop_pips * ATR_TP_MULTIPLIER / ATR_SL_MULTIPLIER, 1), TAKE_PROFIT_PIPS)
+    return stop_pips, take_pips
+
+def compute_exits(data, pip_size, stop_loss_pips=STOP_LOSS_PIPS, take_profit_pips=TAKE_PROFIT_PIPS):
+    high = data["High"].to_numpy(dtype=float)
+    low = data["Low"].to_numpy(dtype=float)
+    close = data["Close"].to_numpy(dtype=float)
+    stop_distance = stop_loss_pips * pip_size
+    target_distance = take_profit_pips * pip_size
+
+    exits = {
+        "stop_pips": np.broadcast_to(stop_loss_pips, close.shape),
+        "long_sl": np.round(close - stop_distance, 5),
+        "long_tp": np.round(close + target_distance, 5),
+        "short_sl": np.round(close + stop_distance, 5),
+        "short_tp": np.round(close - target_distance, 5)
+    }
+    exits["long_tp_bar"] = first_crossing(high, exits["long_tp"], True)
+    exits["long_sl_bar"] = first_crossing(low, exits["long_sl"], False)
+    exits["short_tp_bar"] = first_crossing(low, exits["short_tp"], False)
+    exits["short_sl_bar"] = first_crossing(high, exits["short_sl"], True)
+    return exits
+
+def simulate_trades(data, buy, sell, pip_value, pip_size, stop_loss_pips=STOP_LOSS_PIPS, take_profit_pips=TAKE_PROFIT_PIPS, exits=None):
+    close = data["Close"].to_numpy(dtype=float)
+    n = len(close)
+    exits = exits or compute_exits(data, pip_size, stop_loss_pips, take_profit_pips)
+
+    direction = np.where(np.asarray(buy, dtype=bool), 1, np.where(np.asarray(sell, dtype=bool), -1, 0))
+    is_long = direction > 0
+    long_sl, long_tp, short_sl, short_tp = exits["long_sl"], exits["long_tp"], exits["short_sl"], exits["short_tp"]
+    tp_bar = np.where(is_long, exits["long_tp_bar"], exits["short_tp_bar"])
+    sl_bar = np.where(is_long, exits["long_sl_bar"], exits["short_sl_bar"])
+    exit_bar = np.minimum(tp_bar, sl_bar)
+
+    signal_bars = np.flatnonzero(direction)
+    entries = []
+    next_free = 0
+    while True:
+        k = np.searchsorted(signal_bars, next_free)
+        if k >= len(signal_bars):
+            break
+        entry = signal_bars[k]
+        entries.append(entry)
+        if exit_bar[entry] >= n:
+            break
+        next_free = exit_bar[entry] + 1
+    entries = np.array(entries, dtype=int)
+    
+    side = direction[entries]
+    stopped = sl_bar[entries] <= tp_bar[entries]
+    still_open = exit_bar[entries] >= n
+    sl_price = np.where(side > 0, long_sl[entries], short_sl[entries])
+    tp_price = np.where(side > 0, long_tp[entries], short_tp[entries])
+    exit_price = np.where(still_open, close[-1], np.where(stopped, sl_price, tp_price))
+    
+    lot_size = np.array([calculate_lot_size(pip_value, pip_size, stop_pips) for stop_pips in exits["stop_pips"][entries]])
+    pips = (exit_price - close[entries]) * side / pip_size
+    pnl = pips * pip_value * pip_size * lot_size
+    
+    return pd.DataFrame({
+        "entry_time": data.index[entries],
+        "exit_time": data.index[np.minimum(exit_bar[entries], n - 1)],
+        "direction": np.where(side > 0, "BUY", "SELL"),
+        "entry": close[entries],
+        "exit": exit_price,
+        "bars_held": np.minimum(exit_bar[entries], n - 1) - entries,
+        "stop_pips": exits["stop_pips"][entries],
+        "lot_size": lot_size,
+        "pips": pips,
+        "pnl": pnl,
+        "outcome": np.where(still_open, "OPEN", np.where(stopped, "LOSS", "WIN"))
+    })
+
+def summarize_trades(trades):
+    closed = trades[trades["outcome"] != "OPEN"]
+    equity = np.concatenate([[0.0], trades["pnl"].cumsum().to_numpy()])
+    drawdown = float((np.maximum.accumulate(equity) - equity).max())
+    
+    return {
+        "trades": len(trades),
+        "win_rate": float((closed["outcome"] == "WIN").mean() * 100) if len(closed) else 0.0,
+        "expectancy": float(trades["pnl"].mean()) if len(trades) else 0.0,
+        "total_pnl": float(trades["pnl"].sum()),
+        "max_drawdown": drawdown,
+        "max_drawdown_pct": drawdown / ACCOUNT_BALANCE * 100,
+        "avg_bars_held": float(trades["bars_held"].mean()) if len(trades) else 0.0,
+        "avg_stop_pips": float(trades["stop_pips"].mean()) if len(trades) else 0.0
+    }
+
+def backtest_pair(data, pair_key, strategy_types=None, params=DEFAULT_PARAMS, ind=None, risk_modes=(RISK_MODE,)):
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    ind = ind or Indicators(data)
+    exits = {}
+    for risk_mode in risk_modes:
+        if risk_mode == "atr":
+            exits[risk_mode] = compute_exits(data, pip_size, *atr_exit_pips(ind, pip_size))
+        else:
+            exits[risk_mode] = compute_exits(data, pip_size, params["stop_loss_pips"], params["take_profit_pips"])
+
+    rows = []
+    for strategy_type in strategy_types or list(STRATEGY_RULES) + [SURE_SHOT]:
+        strategy_name, rule = strategy_rule(strategy_type)
+        buy, sell = rule(ind, params)
+        for risk_mode in risk_modes:
+            trades = simulate_trades(data, buy, sell, pip_value, pip_size, exits=exits[risk_mode])
+            rows.append({"pair": pair_name, "strategy": strategy_name, "risk_mode": risk_mode, **summarize_trades(trades)})
+    return rows
+
+def compare_risk_modes(results):
+    table = results.groupby(["strategy", "risk_mode"]).agg(
+        trades=("trades", "sum"),
+        win_rate=("win_rate", "mean"),
+        expectancy=("expectancy", "mean"),
+        total_pnl=("total_pnl", "sum"),
+        max_drawdown=("max_drawdown", "max"),
+        avg_stop_pips=("avg_stop_pips", "mean")
+    )
+    return table.unstack("risk_mode")
+
+def run_backtest(data_dir, pair_keys=None, strategy_types=None, interval=INTERVAL, risk_modes=(RISK_MODE,)):
+    rows = []
+    for pair_key in pair_keys or PAIRS:
+        path = find_bar_file(data_dir, PAIRS[pair_key][0], interval)
+        if path is None:
+            print(f"No bar file for {pair_key} in {data_dir}, skipping")
+            continue
+        
+        data = read_bar_file(path)
+        if len(data) < 200:
+            print(f"Not enough data for {pair_key} ({len(data)} rows), skipping")
+            continue
+        rows.extend(backtest_pair(data, pair_key, strategy_types, risk_modes=risk_modes))
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the signal strategies on local OHLCV files")
+    parser.add_argument("data_dir", help="directory with one bar store .npy, Parquet or CSV file per pair, e.g. bar_store/ or eurusd.csv")
+    parser.add_argument("--pairs", nargs="+", choices=list(PAIRS), help="pairs to test (default: all)")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGY_RULES) + [SURE_SHOT], help="strategies to test (default: all plus the sure-shot combination)")
+    parser.add_argument("--interval", default=INTERVAL)
+    parser.add_argument("--risk-modes", nargs="+", default=[RISK_MODE], choices=RISK_MODES, help="SL/TP modes to test; pass both to compare fixed pips against ATR exits")
+    parser.add_argument("--output", help="also write the results table to this CSV file")
+    args = parser.parse_args()
+    
+    started = time.time()
+    results = run_backtest(args.data_dir, args.pairs, args.strategies, args.interval, args.risk_modes)
+    if results.empty:
+        print("No results")
+        return
+    
+    print(results.sort_values(["pair", "expectancy"], ascending=[True, False]).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if len(args.risk_modes) > 1:
+        print("\n" + compare_risk_modes(results).to_string(float_format=lambda v: f"{v:.2f}"))
+    print(f"\nBacktest finished in {time.time() - started:.2f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
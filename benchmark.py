@@ -0,0 +1,217 @@
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import main as core
+from main import (
+    PAIRS, INTERVAL, ALL_STRATEGIES, ALL_STRATEGY_INDICATORS,
+    Indicators, StreamingIndicators, BarArrays, stream_indicators, compute_signal, evaluate_strategies, format_signal,
+    calculate_lot_size, calculate_tp_sl, interval_seconds, find_bar_file, read_bar_file,
+    INDICATOR_CACHE, STREAM_CACHE, SIGNAL_CACHE
+)
+
+DEFAULT_SIZES = [500, 5000, 50000]
+DEFAULT_SYMBOLS = [1, 10]
+STAGES = ["indicators_pandas", "indicators_streaming", "indicators_numpy", "strategies", "sure_shot", "format", "pipeline"]
+
+class NullBot:
+    def send_message(self, chat_id, text, **kwargs):
+        return None
+
+def synthetic_bars(n, seed=0, start="2020-01-06", interval=INTERVAL, base=1.1):
+    rng = np.random.default_rng(seed)
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0004, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0004, n)))
+    index = pd.date_range(start, periods=n, freq=f"{interval_seconds(interval)}s", tz="UTC")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": 0.0}, index=index)
+
+def recorded_bars(data_dir, pair_key, interval=INTERVAL):
+    path = find_bar_file(data_dir, PAIRS[pair_key][0], interval)
+    if path is None:
+        return None
+    return read_bar_file(path)
+
+def clear_caches():
+    INDICATOR_CACHE.clear()
+    STREAM_CACHE.clear()
+    SIGNAL_CACHE.clear()
+
+def warm_streams(symbols, frames):
+    clear_caches()
+    for pair_symbol, data in zip(symbols, frames):
+        stream_indicators(pair_symbol, data.iloc[:-1])
+    INDICATOR_CACHE.clear()
+
+def measure(func, repeat, setup=clear_caches):
+    timings = []
+    for _ in range(repeat):
+        setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    setup()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "peak_kb": peak / 1024}
+
+def stage_functions(data, pair_key):
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    ind = Indicators(data).compute(ALL_STRATEGY_INDICATORS)
+    price = float(data["Close"].iloc[-1])
+    sl, tp = calculate_tp_sl(price, "BUY", pip_size)
+    lot_size = calculate_lot_size(pip_value, pip_size)
+    bench_symbol = f"BENCH_{pair_symbol}"
+    
+    functions = {
+        "indicators_pandas": lambda: Indicators(data).compute(ALL_STRATEGY_INDICATORS),
+        "indicators_streaming": lambda: StreamingIndicators(ALL_STRATEGY_INDICATORS).update_frame(data),
+        "indicators_numpy": lambda: BarArrays.from_frame(data).compute(ALL_STRATEGY_INDICATORS),
+        "sure_shot": lambda: evaluate_strategies(ind),
+        "format": lambda: format_signal(pair_name, "BUY", "Benchmark", lot_size, "Benchmark", price, sl, tp, pip_size=pip_size),
+        "pipeline": lambda: compute_signal(bench_symbol, pip_value, pip_size, "BOTH", data)
+    }
+    setups = {"pipeline": lambda: warm_streams([bench_symbol], [data])}
+    for strategy_name, strategy in ALL_STRATEGIES:
+        functions[f"strategy:{strategy_name}"] = lambda strategy=strategy: strategy(ind)
+    return functions, setups
+
+def run_stages(fixture, data, pair_key, stages, repeat):
+    rows = []
+    functions, setups = stage_functions(data, pair_key)
+    for stage, func in functions.items():
+        group = "strategies" if stage.startswith("strategy:") else stage
+        if group not in stages:
+            continue
+        rows.append({"fixture": fixture, "bars": len(data), "stage": stage, "symbols": 1, **measure(func, repeat, setups.get(stage, clear_caches))})
+    return rows
+
+def run_throughput(fixture, frames, repeat):
+    pair_keys = list(PAIRS)
+    pairs = [PAIRS[pair_keys[i % len(pair_keys)]] for i in range(len(frames))]
+    symbols = [f"BENCH{i}_{pair[0]}" for i, pair in enumerate(pairs)]
+    
+    def signal_sweep():
+        for pair_symbol, pair, data in zip(symbols, pairs, frames):
+            compute_signal(pair_symbol, pair[2], pair[3], "BOTH", data)
+    
+    def sure_shot_sweep():
+        for data in frames:
+            evaluate_strategies(Indicators(data).compute(ALL_STRATEGY_INDICATORS))
+    
+    rows = []
+    for stage, sweep, setup in [
+        ("throughput_signal", signal_sweep, lambda: warm_streams(symbols, frames)),
+        ("throughput_sure_shot", sure_shot_sweep, clear_caches)
+    ]:
+        row = {"fixture": fixture, "bars": len(frames[0]), "stage": stage, "symbols": len(frames), **measure(sweep, repeat, setup)}
+        row["pairs_per_sec"] = len(frames) / (row["median_ms"] / 1000)
+        rows.append(row)
+    return rows
+
+def run_benchmark(sizes, symbol_counts, stages, repeat, data_dir=None, interval=INTERVAL):
+    core.bot = NullBot()
+    fixtures = [("synthetic", None)]
+    if data_dir:
+        fixtures += [(f"recorded:{pair_key}", pair_key) for pair_key in PAIRS]
+    
+    rows = []
+    for fixture, pair_key in fixtures:
+        source = None
+        if pair_key is not None:
+            started = time.perf_counter()
+            source = recorded_bars(data_dir, pair_key, interval)
+            if source is None:
+                continue
+            rows.append({"fixture": fixture, "bars": len(source), "stage": "load", "symbols": 1, "median_ms": (time.perf_counter() - started) * 1000})
+        
+        for size in sizes:
+            if source is not None and len(source) < size:
+                continue
+            
+            data = synthetic_bars(size, interval=interval) if source is None else source.tail(size)
+            print(f"Benchmarking {fixture} with {size} bars...")
+            rows.extend(run_stages(fixture, data, pair_key or "eurusd", stages, repeat))
+            
+            if "throughput" in stages:
+                for count in symbol_counts:
+                    frames = [synthetic_bars(size, seed=i, interval=interval) for i in range(count)] if source is None else [data] * count
+                    rows.extend(run_throughput(fixture, frames, repeat))
+    return rows
+
+def compare_results(rows, baseline, threshold):
+    previous = {(r["fixture"], r["bars"], r["stage"], r["symbols"]): r for r in baseline["results"]}
+    table = []
+    for row in rows:
+        before = previous.get((row["fixture"], row["bars"], row["stage"], row["symbols"]))
+        if before is None or not before["median_ms"]:
+            continue
+        ratio = row["median_ms"] / before["median_ms"]
+        table.append({
+            "fixture": row["fixture"],
+            "bars": row["bars"],
+            "stage": row["stage"],
+            "symbols": row["symbols"],
+            "baseline_ms": before["median_ms"],
+            "current_ms": row["median_ms"],
+            "ratio": ratio,
+            "regression": ratio > threshold
+        })
+    return pd.DataFrame(table)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the signal pipeline offline on synthetic and recorded OHLCV fixtures")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="bar counts per fixture (up to 1000000)")
+    parser.add_argument("--symbols", nargs="+", type=int, default=DEFAULT_SYMBOLS, help="symbol counts for the throughput sweep")
+    parser.add_argument("--stages", nargs="+", default=STAGES + ["throughput"], choices=STAGES + ["throughput"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", help="also benchmark recorded bar files from this directory (same layout as backtest.py)")
+    parser.add_argument("--interval", default=INTERVAL)
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline written by --save")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+    
+    rows = run_benchmark(args.sizes, args.symbols, args.stages, args.repeat, args.data_dir, args.interval)
+    results = pd.DataFrame(rows)
+    print(results.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    
+    if args.save:
+        meta = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "indicator_engine": core.INDICATOR_ENGINE,
+            "repeat": args.repeat
+        }
+        with open(args.save, "w") as f:
+            json.dump({"meta": meta, "results": rows}, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        comparison = compare_results(rows, baseline, args.threshold)
+        if comparison.empty:
+            print("\nNothing comparable in the baseline")
+            return
+        
+        print("\n" + comparison.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        regressions = comparison[comparison["regression"]]
+        if not regressions.empty:
+            print(f"\n{len(regressions)} stage(s) slower than {args.threshold:.2f}x the baseline")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,38 @@
-import yfinance as yf
-import pandas as pd
-import pandas_ta_classic as ta
+import time
+PROCESS_STARTED = time.time()
+
 from telegram import Bot, Update
 from telegram.ext import Updater, CommandHandler, CallbackContext
-import time
+from telegram.error import RetryAfter, BadRequest, Unauthorized, NetworkError
+import importlib
 import threading
 import os
+import copy
+import math
+import heapq
+import io
+import itertools
+import json
+import sqlite3
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+class LazyModule:
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+    
+    def __getattr__(self, attr):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+np = LazyModule("numpy")
+yf = LazyModule("yfinance")
+pd = LazyModule("pandas")
+ta = LazyModule("pandas_ta_classic")
 
 TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
@@ -15,10 +42,26 @@ ACCOUNT_BALANCE = 10000
 RISK_PERCENT = 2
 STOP_LOSS_PIPS = 50
 TAKE_PROFIT_PIPS = 100
+RISK_MODES = ("fixed", "atr")
+RISK_MODE = os.environ.get("RISK_MODE", "fixed").lower()
+if RISK_MODE not in RISK_MODES:
+    raise SystemExit(f"❌ ERROR: Unknown RISK_MODE '{RISK_MODE}' (expected one of: {', '.join(RISK_MODES)})")
+ATR_LENGTH = 14
+ATR_SL_MULTIPLIER = float(os.environ.get("ATR_SL_MULTIPLIER", "1.5"))
+ATR_TP_MULTIPLIER = float(os.environ.get("ATR_TP_MULTIPLIER", "3"))
+MIN_STOP_PIPS = 5
 
 STRATEGY_MODE = "BOTH"
 SURE_SHOT_MIN_STRATEGIES = 3
 
+RSI_BUY_LEVEL = 40
+RSI_SELL_LEVEL = 60
+BB_LENGTH = 20
+BB_STD = 2
+FIB_BUY_LEVEL = 0.618
+FIB_SELL_LEVEL = 0.236
+RANGE_ZONE = 0.2
+
 PAIRS = {
     "eurusd": ("EURUSD=X", "EUR/USD", 10000, 0.0001),
     "gbpusd": ("GBPUSD=X", "GBP/USD", 10000, 0.0001),
@@ -33,59 +76,1175 @@ PAIRS = {
 }
 
 INTERVAL = "15m"
-CHECK_INTERVAL = 900
+MONITOR_INTERVALS = [i.strip() for i in os.environ.get("MONITOR_INTERVALS", INTERVAL).split(",") if i.strip()]
+BAR_SETTLE_SECONDS = float(os.environ.get("BAR_SETTLE_SECONDS", "5"))
+STRAGGLER_RETRIES = int(os.environ.get("STRAGGLER_RETRIES", "4"))
+STRAGGLER_BACKOFF = float(os.environ.get("STRAGGLER_BACKOFF", "5"))
+MTF_INTERVALS = [i.strip() for i in os.environ.get("MTF_INTERVALS", "").split(",") if i.strip()]
+MTF_MIN_AGREE = int(os.environ.get("MTF_MIN_AGREE", "1"))
+MTF_SEED_PERIOD = os.environ.get("MTF_SEED_PERIOD", "60d")
+HISTORY_PERIOD = "5d"
+BAR_HISTORY_LIMIT = 500
+BATCH_CHUNK_SIZE = 50
+DATA_PROVIDER = os.environ.get("DATA_PROVIDER", "yahoo").lower()
+REPLAY_DIR = os.environ.get("REPLAY_DIR", "bar_store")
+REPLAY_SPEED = float(os.environ.get("REPLAY_SPEED", "1000"))
+REPLAY_START = os.environ.get("REPLAY_START", "")
+TELEGRAM_DRY_RUN = os.environ.get("TELEGRAM_DRY_RUN", "").lower() in ("1", "true", "yes")
+if TELEGRAM_DRY_RUN and not CHAT_ID:
+    CHAT_ID = "dry-run"
+BAR_STORE_DIR = os.environ.get("BAR_STORE_DIR", "bar_store") if DATA_PROVIDER != "replay" else ""
+BAR_STORE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+BAR_FILE_EXTENSIONS = (".npy", ".parquet", ".csv")
+INDICATOR_ENGINE = os.environ.get("INDICATOR_ENGINE", "streaming").lower()
+MONITOR_WORKERS = int(os.environ.get("MONITOR_WORKERS", "8"))
+STRATEGY_PROCESSES = int(os.environ.get("STRATEGY_PROCESSES", "0"))
+COMMAND_WORKERS = int(os.environ.get("COMMAND_WORKERS", "16"))
+SIGNAL_CACHE_SIZE = int(os.environ.get("SIGNAL_CACHE_SIZE", "256"))
+FETCH_RATE = float(os.environ.get("FETCH_RATE", "2"))
+FETCH_BURST = int(os.environ.get("FETCH_BURST", "5"))
+STREAM_DEPTH = 10
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_ENABLED = METRICS_PORT > 0 or os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+METRICS_LOG_INTERVAL = float(os.environ.get("METRICS_LOG_INTERVAL", "300"))
+METRICS_PREFIX = "forexbot"
+SEND_CHAT_RATE = float(os.environ.get("SEND_CHAT_RATE", "1"))
+SEND_GLOBAL_RATE = float(os.environ.get("SEND_GLOBAL_RATE", "25"))
+SEND_LINGER = float(os.environ.get("SEND_LINGER", "1"))
+SEND_RETRIES = int(os.environ.get("SEND_RETRIES", "5"))
+SEND_BACKOFF = float(os.environ.get("SEND_BACKOFF", "2"))
+TELEGRAM_MESSAGE_LIMIT = 4096
+MERGED_MESSAGE_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+PORTFOLIO_RISK_PERCENT = float(os.environ.get("PORTFOLIO_RISK_PERCENT", "5"))
+CORRELATION_WINDOW = int(os.environ.get("CORRELATION_WINDOW", "200"))
+CORRELATION_INTERVAL = os.environ.get("CORRELATION_INTERVAL", MONITOR_INTERVALS[0] if MONITOR_INTERVALS else INTERVAL)
+MIN_LOT_SIZE = 0.01
+SIGNAL_JOURNAL = os.environ.get("SIGNAL_JOURNAL", "signals.db" if DATA_PROVIDER != "replay" else "")
+JOURNAL_RESOLVE_INTERVAL = float(os.environ.get("JOURNAL_RESOLVE_INTERVAL", "60"))
+JOURNAL_RESOLVE_BATCH = 500
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    pair TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    bar_time INTEGER NOT NULL,
+    signal TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    entry REAL,
+    sl REAL,
+    tp REAL,
+    lot_size REAL,
+    sent_at REAL,
+    outcome TEXT,
+    resolved_bar INTEGER,
+    UNIQUE (pair, interval, bar_time, signal, kind)
+);
+CREATE INDEX IF NOT EXISTS signals_open ON signals (id) WHERE outcome IS NULL;
+CREATE INDEX IF NOT EXISTS signals_strategy ON signals (kind, strategy, outcome);
+"""
+
+INTERVAL_UNITS = {"m": 60, "h": 3600, "d": 86400, "wk": 604800, "mo": 2592000}
+
+class DryRunBot:
+    def __init__(self):
+        self.sent = 0
+        self.lock = threading.Lock()
+    
+    def send_message(self, chat_id, text, **kwargs):
+        with self.lock:
+            self.sent += 1
+            count = self.sent
+        print(f"[dry-run #{count}] to {chat_id}: {text.splitlines()[0] if text else ''}")
+
+bot = None
+BOT_LOCK = threading.Lock()
+
+def get_bot():
+    global bot
+    with BOT_LOCK:
+        if bot is None:
+            bot = DryRunBot() if TELEGRAM_DRY_RUN else Bot(token=TOKEN)
+    return bot
+
+BAR_CACHE = {}
+BAR_CACHE_LOCK = threading.Lock()
+BAR_FETCH_LOCKS = {}
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def try_acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+class NullTimer:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class MetricTimer:
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.key, time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+class Metrics:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+    
+    def key(self, name, labels):
+        return (name, tuple(sorted(labels.items())))
+    
+    def timer(self, name, **labels):
+        if not self.enabled:
+            return NULL_TIMER
+        return MetricTimer(self, self.key(name, labels))
+    
+    def timed(self, name, **labels):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with MetricTimer(self, self.key(name, dict(labels, function=func.__name__))):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+    
+    def record(self, key, seconds, failed=False):
+        with self.lock:
+            stats = self.timers.setdefault(key, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += failed
+    
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self.record(self.key(name, labels), seconds)
+    
+    def incr(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def gauge(self, name, value, **labels):
+        if self.enabled:
+            with self.lock:
+                self.gauges[self.key(name, labels)] = value
+    
+    def render(self):
+        def series(name, labels, value):
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            return f"{METRICS_PREFIX}_{name}{{{label_text}}} {value}" if label_text else f"{METRICS_PREFIX}_{name} {value}"
+        
+        lines = []
+        with self.lock:
+            for (name, labels), (count, total, peak, errors) in sorted(self.timers.items()):
+                lines.append(series(f"{name}_seconds_count", labels, count))
+                lines.append(series(f"{name}_seconds_sum", labels, f"{total:.6f}"))
+                lines.append(series(f"{name}_seconds_max", labels, f"{peak:.6f}"))
+                lines.append(series(f"{name}_errors_total", labels, errors))
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(series(f"{name}_total", labels, value))
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(series(name, labels, f"{value:.6f}"))
+        return "\n".join(lines) + "\n"
+    
+    def summary(self):
+        def label(name, labels):
+            return name + "".join(f"[{v}]" for _, v in labels)
+        
+        with self.lock:
+            timers = {
+                label(name, labels): {"count": count, "avg_ms": round(total / count * 1000, 3), "max_ms": round(peak * 1000, 3), "errors": errors}
+                for (name, labels), (count, total, peak, errors) in self.timers.items() if count
+            }
+            counters = {label(name, labels): value for (name, labels), value in self.counters.items()}
+            gauges = {label(name, labels): round(value, 4) for (name, labels), value in self.gauges.items()}
+        return {"timers": timers, "counters": counters, "gauges": gauges}
+
+METRICS = Metrics(METRICS_ENABLED)
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
 
-bot = Bot(token=TOKEN)
+def log_metrics():
+    while True:
+        time.sleep(METRICS_LOG_INTERVAL)
+        print("📈 metrics " + json.dumps(METRICS.summary(), sort_keys=True))
+
+def start_metrics():
+    if not METRICS_ENABLED:
+        return
+    
+    if METRICS_PORT:
+        server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics: http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_LOG_INTERVAL > 0:
+        threading.Thread(target=log_metrics, daemon=True).start()
+
+MONITOR_POOL = ThreadPoolExecutor(max_workers=MONITOR_WORKERS, thread_name_prefix="monitor")
+STRATEGY_POOL = None
+COMMAND_POOL = ThreadPoolExecutor(max_workers=COMMAND_WORKERS, thread_name_prefix="command")
+INFLIGHT_SIGNALS = {}
+INFLIGHT_LOCK = threading.Lock()
+
+def interval_seconds(interval):
+    amount = int("".join(ch for ch in interval if ch.isdigit()))
+    unit = "".join(ch for ch in interval if not ch.isdigit())
+    return amount * INTERVAL_UNITS[unit]
 
-def calculate_lot_size(pip_value_per_lot, pip_size):
+def next_bar_close(now, interval):
+    step = interval_seconds(interval)
+    return (int(now) // step + 1) * step
+
+def closed_bars(data, interval, now=None):
+    if data.empty:
+        return data
+    now = PROVIDER.now() if now is None else now
+    cutoff = pd.Timestamp(now - interval_seconds(interval), unit="s", tz="UTC")
+    return data[data.index <= cutoff]
+
+def to_utc(data):
+    if isinstance(data.index, pd.DatetimeIndex):
+        if data.index.tz is None:
+            data.index = data.index.tz_localize("UTC")
+        else:
+            data.index = data.index.tz_convert("UTC")
+    return data
+
+class YahooProvider:
+    def __init__(self):
+        self.limiter = TokenBucket(FETCH_RATE, FETCH_BURST)
+        self.download_lock = threading.Lock()
+    
+    def now(self):
+        return time.time()
+    
+    def sleep(self, seconds):
+        time.sleep(seconds)
+    
+    def fetch(self, pair_symbol, interval, period=HISTORY_PERIOD, start=None):
+        self.limiter.acquire()
+        if start is not None:
+            data = yf.Ticker(pair_symbol).history(start=start, interval=interval)
+        else:
+            data = yf.Ticker(pair_symbol).history(period=period, interval=interval)
+        
+        return to_utc(data[[c for c in data.columns if c in BAR_STORE_COLUMNS]])
+    
+    def fetch_batch(self, symbols, interval, period=HISTORY_PERIOD, start=None):
+        self.limiter.acquire()
+        with self.download_lock:
+            if start is not None:
+                data = yf.download(symbols, start=start, interval=interval, group_by="ticker", progress=False)
+            else:
+                data = yf.download(symbols, period=period, interval=interval, group_by="ticker", progress=False)
+        
+        frames = {}
+        if data.empty:
+            return frames
+        
+        if not isinstance(data.columns, pd.MultiIndex):
+            if len(symbols) == 1:
+                frames[symbols[0]] = to_utc(data.dropna(how="all"))
+            return frames
+        
+        tickers = set(data.columns.get_level_values(0))
+        for symbol in symbols:
+            if symbol in tickers:
+                frame = data[symbol].dropna(how="all")
+                if not frame.empty:
+                    frames[symbol] = to_utc(frame)
+        return frames
+
+class ReplayProvider:
+    def __init__(self, data_dir, speed=REPLAY_SPEED, start=None):
+        self.data_dir = data_dir
+        self.speed = speed
+        self.start = pd.Timestamp(start, tz="UTC").timestamp() if start else None
+        self.wall_start = time.monotonic()
+        self.frames = {}
+        self.lock = threading.Lock()
+    
+    def bars(self, pair_symbol, interval):
+        key = (pair_symbol, interval)
+        with self.lock:
+            if key not in self.frames:
+                path = find_bar_file(self.data_dir, pair_symbol, interval)
+                self.frames[key] = read_bar_file(path) if path else pd.DataFrame(columns=BAR_STORE_COLUMNS)
+                if self.start is None and len(self.frames[key]):
+                    warmup = self.frames[key].index[min(BAR_HISTORY_LIMIT, len(self.frames[key]) - 1)]
+                    self.start = warmup.timestamp() + interval_seconds(interval)
+                    self.wall_start = time.monotonic()
+            return self.frames[key]
+    
+    def now(self):
+        if self.start is None:
+            for pair_symbol, _, _, _ in PAIRS.values():
+                if self.start is None:
+                    self.bars(pair_symbol, INTERVAL)
+        if self.start is None:
+            return time.time()
+        return self.start + (time.monotonic() - self.wall_start) * self.speed
+    
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+    
+    def fetch(self, pair_symbol, interval, period=HISTORY_PERIOD, start=None):
+        data = self.bars(pair_symbol, interval)
+        if data.empty:
+            return data
+        
+        now = pd.Timestamp(self.now(), unit="s", tz="UTC")
+        end = data.index.searchsorted(now - pd.Timedelta(seconds=interval_seconds(interval)), side="right")
+        if start is not None:
+            begin = data.index.searchsorted(start, side="left")
+        else:
+            begin = data.index.searchsorted(now - pd.Timedelta(seconds=interval_seconds(period)), side="right")
+        return data.iloc[begin:end]
+    
+    def fetch_batch(self, symbols, interval, period=HISTORY_PERIOD, start=None):
+        frames = {}
+        for symbol in symbols:
+            frame = self.fetch(symbol, interval, period, start)
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+def make_provider():
+    if DATA_PROVIDER == "replay":
+        print(f"📼 Replaying bars from {REPLAY_DIR} at {REPLAY_SPEED:g}x")
+        return ReplayProvider(REPLAY_DIR, REPLAY_SPEED, REPLAY_START or None)
+    return YahooProvider()
+
+PROVIDER = make_provider()
+
+@METRICS.timed("fetch")
+def download_bars(pair_symbol, interval=INTERVAL, period=HISTORY_PERIOD, start=None):
+    return closed_bars(PROVIDER.fetch(pair_symbol, interval, period, start), interval)
+
+def merge_bars(history, fresh):
+    if fresh.empty:
+        return history.tail(BAR_HISTORY_LIMIT)
+    
+    if fresh.index[0] > history.index[-1]:
+        return None
+    
+    merged = pd.concat([history[history.index < fresh.index[0]], fresh])
+    return merged.tail(BAR_HISTORY_LIMIT)
+
+def refresh_bars(pair_symbol, interval, history):
+    if history is None or history.index[-1].timestamp() < PROVIDER.now() - interval_seconds(HISTORY_PERIOD):
+        return download_bars(pair_symbol, interval).tail(BAR_HISTORY_LIMIT)
+    
+    fresh = download_bars(pair_symbol, interval, start=history.index[-1])
+    merged = merge_bars(history, fresh)
+    
+    if merged is None:
+        print(f"Gap detected for {pair_symbol} ({interval}), resyncing full history")
+        return download_bars(pair_symbol, interval).tail(BAR_HISTORY_LIMIT)
+    
+    return merged
+
+@METRICS.timed("fetch")
+def download_bars_batch(symbols, interval=INTERVAL, period=HISTORY_PERIOD, start=None):
+    frames = PROVIDER.fetch_batch(symbols, interval, period, start)
+    return {symbol: closed_bars(frame, interval) for symbol, frame in frames.items()}
+
+def bar_file_stem(pair_symbol, interval=INTERVAL):
+    return f"{pair_symbol}_{interval}"
+
+def find_bar_file(data_dir, pair_symbol, interval=INTERVAL):
+    pair_keys = [key for key, value in PAIRS.items() if value[0] == pair_symbol]
+    stems = [bar_file_stem(pair_symbol, interval)] + [f"{key}_{interval}" for key in pair_keys] + [pair_symbol] + pair_keys
+    for stem in stems:
+        for extension in BAR_FILE_EXTENSIONS:
+            for candidate in (stem, stem.lower(), stem.upper()):
+                path = os.path.join(data_dir, candidate + extension)
+                if os.path.exists(path):
+                    return path
+    return None
+
+def read_bar_file(path):
+    if str(path).endswith(".npy"):
+        return load_bar_array(path)
+    
+    if str(path).endswith(".parquet"):
+        data = pd.read_parquet(path)
+    else:
+        data = pd.read_csv(path)
+    
+    columns = {c: c.strip().capitalize() for c in data.columns}
+    data = data.rename(columns=columns)
+    time_columns = [c for c in data.columns if c in ("Datetime", "Date", "Time", "Timestamp") or c.startswith("Unnamed")]
+    if time_columns:
+        data = data.set_index(time_columns[0])
+    
+    if not isinstance(data.index, pd.DatetimeIndex):
+        data.index = pd.to_datetime(data.index, utc=True)
+    elif data.index.tz is None:
+        data.index = data.index.tz_localize("UTC")
+    
+    data = data[[c for c in ("Open", "High", "Low", "Close", "Volume") if c in data.columns]]
+    return data.sort_index()
+
+BAR_STORE_LOCK = threading.Lock()
+
+def bar_store_path(pair_symbol, interval=INTERVAL):
+    return os.path.join(BAR_STORE_DIR, bar_file_stem(pair_symbol, interval) + ".npy")
+
+def bars_from_array(array):
+    index = pd.to_datetime(array[:, 0], unit="s", utc=True)
+    return pd.DataFrame(array[:, 1:], index=index, columns=BAR_STORE_COLUMNS, copy=False)
+
+def load_bar_array(path):
+    return bars_from_array(np.load(path, mmap_mode="r"))
+
+def load_stored_bars(pair_symbol, interval=INTERVAL):
+    if not BAR_STORE_DIR:
+        return None
+    
+    path = bar_store_path(pair_symbol, interval)
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        data = load_bar_array(path)
+    except Exception as e:
+        print(f"Could not read bar store {path}: {e}")
+        return None
+    return data if not data.empty else None
+
+def append_bar_rows(path, rows):
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if fortran_order or dtype != np.float64 or len(shape) != 2 or shape[1] != rows.shape[1]:
+            return False
+        
+        if shape[0]:
+            f.seek(offset + (shape[0] - 1) * shape[1] * dtype.itemsize)
+            rows = rows[rows[:, 0] > np.frombuffer(f.read(dtype.itemsize), dtype=dtype)[0]]
+        if not len(rows):
+            return True
+        
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (shape[0] + len(rows), shape[1])})
+        if len(header.getvalue()) != offset:
+            return False
+        
+        f.seek(offset + shape[0] * shape[1] * dtype.itemsize)
+        f.write(rows.astype(dtype).tobytes())
+        f.flush()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+def save_stored_bars(pair_symbol, interval, data):
+    if not BAR_STORE_DIR or data.empty:
+        return
+    
+    rows = np.column_stack([data.index.asi8 / 1e9] + [
+        data[c].to_numpy(dtype=float) if c in data.columns else np.zeros(len(data)) for c in BAR_STORE_COLUMNS
+    ])
+    path = bar_store_path(pair_symbol, interval)
+    
+    with BAR_STORE_LOCK:
+        os.makedirs(BAR_STORE_DIR, exist_ok=True)
+        if os.path.exists(path):
+            if append_bar_rows(path, rows):
+                return
+            existing = np.load(path, mmap_mode="r")
+            rows = np.concatenate([existing[existing[:, 0] < rows[0, 0]], rows])
+        
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, rows)
+        os.replace(tmp_path, path)
+
+def store_bars(pair_symbol, interval, data):
+    BAR_CACHE[(pair_symbol, interval)] = (data, next_bar_close(PROVIDER.now(), interval))
+    invalidate_signals(pair_symbol, interval, data.index[-1])
+    try:
+        save_stored_bars(pair_symbol, interval, data)
+    except Exception as e:
+        print(f"Could not write bar store for {pair_symbol} ({interval}): {e}")
+
+def expire_bars(symbols, interval=INTERVAL):
+    for symbol in symbols:
+        cached = BAR_CACHE.get((symbol, interval))
+        if cached:
+            BAR_CACHE[(symbol, interval)] = (cached[0], 0)
+
+def prefetch_bars(symbols, interval=INTERVAL):
+    if is_derived_interval(interval):
+        interval = INTERVAL
+    stale = sorted(s for s in set(symbols) if PROVIDER.now() >= BAR_CACHE.get((s, interval), (None, 0))[1])
+    if not stale:
+        return
+    
+    with BAR_CACHE_LOCK:
+        fetch_locks = [BAR_FETCH_LOCKS.setdefault((s, interval), threading.Lock()) for s in stale]
+    
+    for fetch_lock in fetch_locks:
+        fetch_lock.acquire()
+    try:
+        fresh_symbols = []
+        update_symbols = []
+        for symbol in stale:
+            cached = BAR_CACHE.get((symbol, interval))
+            if not cached:
+                stored = load_stored_bars(symbol, interval)
+                if stored is None:
+                    fresh_symbols.append(symbol)
+                    continue
+                cached = BAR_CACHE[(symbol, interval)] = (stored.tail(BAR_HISTORY_LIMIT), 0)
+            
+            if cached[0].index[-1].timestamp() < PROVIDER.now() - interval_seconds(HISTORY_PERIOD):
+                fresh_symbols.append(symbol)
+            elif PROVIDER.now() >= cached[1]:
+                update_symbols.append(symbol)
+        
+        for i in range(0, len(fresh_symbols), BATCH_CHUNK_SIZE):
+            chunk = fresh_symbols[i:i + BATCH_CHUNK_SIZE]
+            for symbol, frame in download_bars_batch(chunk, interval).items():
+                if not frame.empty:
+                    store_bars(symbol, interval, frame.tail(BAR_HISTORY_LIMIT))
+        
+        for i in range(0, len(update_symbols), BATCH_CHUNK_SIZE):
+            chunk = update_symbols[i:i + BATCH_CHUNK_SIZE]
+            start = min(BAR_CACHE[(s, interval)][0].index[-1] for s in chunk)
+            frames = download_bars_batch(chunk, interval, start=start)
+            for symbol in chunk:
+                history = BAR_CACHE[(symbol, interval)][0]
+                merged = merge_bars(history, frames.get(symbol, history.iloc[0:0]))
+                if merged is None:
+                    merged = refresh_bars(symbol, interval, None)
+                if not merged.empty:
+                    store_bars(symbol, interval, merged)
+    finally:
+        for fetch_lock in fetch_locks:
+            fetch_lock.release()
+
+def get_bars(pair_symbol, interval=INTERVAL):
+    if is_derived_interval(interval):
+        return derived_bars(pair_symbol, interval)
+    
+    key = (pair_symbol, interval)
+    with BAR_CACHE_LOCK:
+        fetch_lock = BAR_FETCH_LOCKS.setdefault(key, threading.Lock())
+    
+    with fetch_lock:
+        cached = BAR_CACHE.get(key)
+        if cached and PROVIDER.now() < cached[1]:
+            return cached[0]
+        
+        history = cached[0] if cached else load_stored_bars(pair_symbol, interval)
+        if history is not None:
+            history = history.tail(BAR_HISTORY_LIMIT)
+        data = refresh_bars(pair_symbol, interval, history)
+        if not data.empty:
+            store_bars(pair_symbol, interval, data)
+        return data
+
+def warm_up():
+    warmed = 0
+    for interval in MONITOR_INTERVALS:
+        if is_derived_interval(interval):
+            continue
+        
+        for pair_symbol, pair_name, pip_value, pip_size in PAIRS.values():
+            key = (pair_symbol, interval)
+            with BAR_CACHE_LOCK:
+                fetch_lock = BAR_FETCH_LOCKS.setdefault(key, threading.Lock())
+            
+            try:
+                with fetch_lock:
+                    if key in BAR_CACHE:
+                        continue
+                    stored = load_stored_bars(pair_symbol, interval)
+                    if stored is None or len(stored) < 200:
+                        continue
+                    data = stored.tail(BAR_HISTORY_LIMIT)
+                    BAR_CACHE[key] = (data, 0)
+                get_indicators(pair_symbol, data, interval).compute(ALL_STRATEGY_INDICATORS)
+                warmed += 1
+            except Exception as e:
+                print(f"Warm-up error for {pair_name} ({interval}): {e}")
+    
+    ready = time.time() - PROCESS_STARTED
+    METRICS.gauge("first_signal_ready_seconds", ready)
+    print(f"⚡ Ready for signals {ready:.2f}s after start ({warmed} series warmed from {BAR_STORE_DIR or 'no bar store'})")
+
+RESAMPLE_RULES = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+RESAMPLE_CACHE = {}
+RESAMPLE_LOCK = threading.Lock()
+
+def is_derived_interval(interval):
+    return interval != INTERVAL and interval in MTF_INTERVALS
+
+def resample_bars(data, interval, complete_until):
+    step = interval_seconds(interval)
+    rules = {c: rule for c, rule in RESAMPLE_RULES.items() if c in data.columns}
+    frame = data.resample(f"{step}s", origin="epoch", label="left", closed="left").agg(rules).dropna(subset=["Open"])
+    return frame[frame.index + pd.Timedelta(seconds=step) <= complete_until]
+
+def seed_derived_bars(pair_symbol, interval, base, complete_until):
+    source = base
+    stored = load_stored_bars(pair_symbol, INTERVAL)
+    if stored is not None:
+        source = pd.concat([stored[stored.index < base.index[0]], base])
+    
+    frame = resample_bars(source, interval, complete_until)
+    if len(frame) < 200:
+        seed = download_bars(pair_symbol, INTERVAL, period=MTF_SEED_PERIOD)
+        if not seed.empty:
+            source = pd.concat([seed[seed.index < source.index[0]], source])
+            frame = resample_bars(source, interval, complete_until)
+    return frame
+
+def derived_bars(pair_symbol, interval):
+    base = get_bars(pair_symbol, INTERVAL)
+    if base.empty:
+        return base
+    
+    key = (pair_symbol, interval)
+    step = pd.Timedelta(seconds=interval_seconds(interval))
+    complete_until = base.index[-1] + pd.Timedelta(seconds=interval_seconds(INTERVAL))
+    with RESAMPLE_LOCK:
+        cached = RESAMPLE_CACHE.get(key)
+        if cached is not None and len(cached) and cached.index[-1] + step >= base.index[0]:
+            next_start = cached.index[-1] + step
+            if next_start + step > complete_until:
+                return cached
+            fresh = resample_bars(base[base.index >= next_start], interval, complete_until)
+            frame = pd.concat([cached, fresh]).tail(BAR_HISTORY_LIMIT)
+        else:
+            frame = seed_derived_bars(pair_symbol, interval, base, complete_until).tail(BAR_HISTORY_LIMIT)
+        
+        RESAMPLE_CACHE[key] = frame
+    if not frame.empty:
+        invalidate_signals(pair_symbol, interval, frame.index[-1])
+    return frame
+
+def risk_pips(atr, pip_size):
+    if RISK_MODE != "atr" or not atr > 0:
+        return STOP_LOSS_PIPS, TAKE_PROFIT_PIPS
+    stop_pips = max(MIN_STOP_PIPS, round(atr * ATR_SL_MULTIPLIER / pip_size, 1))
+    return stop_pips, round(stop_pips * ATR_TP_MULTIPLIER / ATR_SL_MULTIPLIER, 1)
+
+def calculate_lot_size(pip_value_per_lot, pip_size, stop_pips=STOP_LOSS_PIPS):
     risk_amount = ACCOUNT_BALANCE * (RISK_PERCENT / 100)
     pip_value_per_pip = pip_value_per_lot * pip_size
-    lot_size = risk_amount / (STOP_LOSS_PIPS * pip_value_per_pip)
+    lot_size = risk_amount / (stop_pips * pip_value_per_pip)
     return round(lot_size, 2)
 
-def calculate_tp_sl(price, signal, pip_size):
+def calculate_tp_sl(price, signal, pip_size, stop_pips=STOP_LOSS_PIPS, target_pips=TAKE_PROFIT_PIPS):
     if signal == "BUY":
-        sl = price - (STOP_LOSS_PIPS * pip_size)
-        tp = price + (TAKE_PROFIT_PIPS * pip_size)
+        sl = price - (stop_pips * pip_size)
+        tp = price + (target_pips * pip_size)
     elif signal == "SELL":
-        sl = price + (STOP_LOSS_PIPS * pip_size)
-        tp = price - (TAKE_PROFIT_PIPS * pip_size)
+        sl = price + (stop_pips * pip_size)
+        tp = price - (target_pips * pip_size)
     else:
         sl = price
         tp = price
     return round(sl, 5), round(tp, 5)
 
+STRATEGY_REGISTRY = {}
+
+def register_strategy(strategy_type, strategy_name, prefix, cost, needs):
+    def decorate(func):
+        STRATEGY_REGISTRY[strategy_type] = (strategy_name, func, prefix, cost, needs)
+        return func
+    return decorate
+
+PRICE_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close"}
+
+INDICATOR_FUNCTIONS = {
+    "ema": lambda data, length: ta.ema(data["Close"], length=length),
+    "sma": lambda data, length: ta.sma(data["Close"], length=length),
+    "rsi": lambda data, length: ta.rsi(data["Close"], length=length),
+    "atr": lambda data, length: ta.atr(data["High"], data["Low"], data["Close"], length=length),
+    "highest": lambda data, length: data["High"].rolling(length).max(),
+    "lowest": lambda data, length: data["Low"].rolling(length).min()
+}
+
+INDICATOR_CACHE = {}
+
+class Indicators:
+    def __init__(self, data):
+        self.data = data
+        self.series = {}
+    
+    def compute(self, needs):
+        for need in needs:
+            self.get(*need)
+        return self
+    
+    def get(self, name, *params):
+        key = (name,) + params
+        if key not in self.series:
+            if name in PRICE_COLUMNS:
+                self.series[key] = self.data[PRICE_COLUMNS[name]]
+            elif name.startswith("bb_"):
+                length, std = params
+                bbands = ta.bbands(self.data["Close"], length=length, std=std)
+                suffix = f"{length}_{float(std)}"
+                self.series[("bb_upper",) + params] = bbands[f"BBU_{suffix}"]
+                self.series[("bb_middle",) + params] = bbands[f"BBM_{suffix}"]
+                self.series[("bb_lower",) + params] = bbands[f"BBL_{suffix}"]
+            else:
+                self.series[key] = INDICATOR_FUNCTIONS[name](self.data, *params)
+        return self.series[key]
+    
+    def value(self, name, *params, ago=0):
+        return float(self.get(name, *params).iloc[-1 - ago])
+
+class StreamingEMA:
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = math.nan
+    
+    def update(self, open_, high, low, close):
+        self.count += 1
+        if self.count < self.length:
+            self.total += close
+        elif self.count == self.length:
+            self.value = (self.total + close) / self.length
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * close
+
+class StreamingRMA:
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.count = 0
+        self.weighted = 0.0
+        self.weights = 0.0
+        self.value = math.nan
+    
+    def update(self, x):
+        self.count += 1
+        self.weighted = x + self.decay * self.weighted
+        self.weights = 1 + self.decay * self.weights
+        if self.count >= self.length:
+            self.value = self.weighted / self.weights
+        return self.value
+
+class StreamingRSI:
+    def __init__(self, length):
+        self.gains = StreamingRMA(length)
+        self.losses = StreamingRMA(length)
+        self.prev_close = None
+        self.value = math.nan
+    
+    def update(self, open_, high, low, close):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain = self.gains.update(max(change, 0.0))
+            loss = abs(self.losses.update(min(change, 0.0)))
+            self.value = 100 * gain / (gain + loss) if gain + loss else math.nan
+        self.prev_close = close
+
+class StreamingATR:
+    def __init__(self, length):
+        self.rma = StreamingRMA(length)
+        self.prev_close = None
+        self.value = math.nan
+    
+    def update(self, open_, high, low, close):
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(self.prev_close - low))
+            self.value = self.rma.update(true_range)
+        self.prev_close = close
+
+class RollingStats:
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.mean = math.nan
+        self.std = math.nan
+        self.running_mean = 0.0
+        self.m2 = 0.0
+    
+    def update(self, open_, high, low, close):
+        self.window.append(close)
+        if len(self.window) <= self.length:
+            delta = close - self.running_mean
+            self.running_mean += delta / len(self.window)
+            self.m2 += delta * (close - self.running_mean)
+        else:
+            dropped = self.window.popleft()
+            previous_mean = self.running_mean
+            self.running_mean += (close - dropped) / self.length
+            self.m2 += (close - dropped) * (close - self.running_mean + dropped - previous_mean)
+        
+        if len(self.window) == self.length:
+            self.mean = self.running_mean
+            self.std = math.sqrt(max(self.m2, 0.0) / self.length)
+
+class RollingExtreme:
+    def __init__(self, length, column, highest):
+        self.length = length
+        self.column = column
+        self.highest = highest
+        self.count = 0
+        self.candidates = deque()
+        self.value = math.nan
+    
+    def update(self, open_, high, low, close):
+        x = high if self.column == "high" else low
+        while self.candidates and (self.candidates[-1][1] <= x if self.highest else self.candidates[-1][1] >= x):
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        if self.candidates[0][0] <= self.count - self.length:
+            self.candidates.popleft()
+        self.count += 1
+        if self.count >= self.length:
+            self.value = self.candidates[0][1]
+
+BAND_SIDES = {"bb_upper": 1, "bb_middle": 0, "bb_lower": -1}
+
+class StreamingIndicators:
+    def __init__(self, needs):
+        self.keys = list(dict.fromkeys([(name,) for name in PRICE_COLUMNS] + list(needs)))
+        self.sources = {}
+        for key in self.keys:
+            name, params = key[0], key[1:]
+            if name == "ema":
+                self.sources.setdefault(key, StreamingEMA(*params))
+            elif name == "rsi":
+                self.sources.setdefault(key, StreamingRSI(*params))
+            elif name == "atr":
+                self.sources.setdefault(key, StreamingATR(*params))
+            elif name == "sma" or name in BAND_SIDES:
+                self.sources.setdefault(("stats", params[0]), RollingStats(params[0]))
+            elif name in ("highest", "lowest"):
+                self.sources.setdefault(key, RollingExtreme(params[0], "high" if name == "highest" else "low", name == "highest"))
+        self.history = {key: deque(maxlen=STREAM_DEPTH) for key in self.keys}
+        self.ema_keys = [key for key in self.keys if key[0] == "ema"]
+        self.window_closes = deque(maxlen=BAR_HISTORY_LIMIT)
+        self.window_emas = {key: deque(maxlen=BAR_HISTORY_LIMIT) for key in self.ema_keys}
+        self.offsets = {}
+        self.last_time = None
+    
+    def update(self, bar_time, open_, high, low, close):
+        for source in self.sources.values():
+            source.update(open_, high, low, close)
+        
+        for key in self.offsets:
+            self.offsets[key] *= 1 - self.sources[key].alpha
+        if self.window_closes is not None:
+            self.window_closes.append(close)
+            for key in self.ema_keys:
+                self.window_emas[key].append(self.sources[key].value)
+        
+        bar = {"open": open_, "high": high, "low": low, "close": close}
+        for key in self.keys:
+            name, params = key[0], key[1:]
+            if name in bar:
+                value = bar[name]
+            elif name == "sma":
+                value = self.sources[("stats", params[0])].mean
+            elif name in BAND_SIDES:
+                stats = self.sources[("stats", params[0])]
+                value = stats.mean + BAND_SIDES[name] * params[1] * stats.std
+            else:
+                value = self.sources[key].value
+            self.history[key].append(value)
+        self.last_time = bar_time
+    
+    def update_frame(self, data):
+        for row in zip(data.index, data["Open"].to_numpy(), data["High"].to_numpy(), data["Low"].to_numpy(), data["Close"].to_numpy()):
+            self.update(row[0], float(row[1]), float(row[2]), float(row[3]), float(row[4]))
+        return self
+    
+    def anchor(self, window):
+        self.offsets = {}
+        for key in self.ema_keys:
+            source = self.sources[key]
+            if window >= source.count or window < source.length or window > len(self.window_closes):
+                continue
+            
+            start = len(self.window_closes) - window
+            seed = sum(itertools.islice(self.window_closes, start, start + source.length)) / source.length
+            drift = seed - self.window_emas[key][start + source.length - 1]
+            self.offsets[key] = drift * (1 - source.alpha) ** (window - source.length)
+        return self
+    
+    def snapshot(self):
+        return copy.deepcopy(self, {id(self.window_closes): None, id(self.window_emas): None})
+    
+    def compute(self, needs):
+        return self
+    
+    def value(self, name, *params, ago=0):
+        key = (name,) + params
+        history = self.history[key]
+        if ago >= len(history):
+            return math.nan
+        if key in self.offsets:
+            return history[-1 - ago] + self.offsets[key] / (1 - self.sources[key].alpha) ** ago
+        return history[-1 - ago]
+
+def ema_array(close, length, out):
+    out[:length - 1] = np.nan
+    if len(close) < length:
+        out[length - 1:] = np.nan
+        return out
+    
+    alpha = 2 / (length + 1)
+    decay = 1 - alpha
+    total = decay + alpha
+    value = float(close[:length].mean())
+    values = [value]
+    append = values.append
+    for x in close[length:].tolist():
+        value = (decay * value + alpha * x) / total
+        append(value)
+    out[length - 1:] = values
+    return out
+
+def rma_array(values, length, out, start=0):
+    decay = 1 - 1 / length
+    weighted = math.nan
+    old_weight = 0.0
+    averages = []
+    append = averages.append
+    for x in values[start:].tolist():
+        old_weight *= decay
+        weighted = (old_weight * weighted + x) / (old_weight + 1) if old_weight else x
+        old_weight += 1
+        append(weighted)
+    out[:start + length - 1] = np.nan
+    out[start + length - 1:] = averages[length - 1:]
+    return out
+
+def rsi_array(close, length, out):
+    change = np.empty_like(close)
+    change[0] = np.nan
+    np.subtract(close[1:], close[:-1], out=change[1:])
+    gains = rma_array(np.maximum(change, 0.0), length, np.empty_like(close), start=1)
+    losses = np.abs(rma_array(np.minimum(change, 0.0), length, np.empty_like(close), start=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.divide(100 * gains, gains + losses, out=out)
+    return out
+
+def atr_array(high, low, close, length, out):
+    true_range = np.empty_like(close)
+    true_range[0] = np.nan
+    prev_close = close[:-1]
+    np.maximum(high[1:] - low[1:], np.abs(high[1:] - prev_close), out=true_range[1:])
+    np.maximum(true_range[1:], np.abs(prev_close - low[1:]), out=true_range[1:])
+    return rma_array(true_range, length, out, start=1)
+
+def rolling_mean(values, length, out):
+    out[:length - 1] = np.nan
+    if len(values) >= length:
+        np.divide(np.convolve(values, np.ones(length), "valid"), length, out=out[length - 1:])
+    return out
+
+def rolling_std(values, length, out):
+    out[:length - 1] = np.nan
+    if len(values) >= length:
+        centered = values - values.mean()
+        mean = np.convolve(centered, np.ones(length), "valid") / length
+        squares = np.convolve(centered * centered, np.ones(length), "valid") / length
+        np.sqrt(np.maximum(squares - mean * mean, 0.0), out=out[length - 1:])
+    return out
+
+def rolling_extreme(values, length, out, reduce):
+    out[:length - 1] = np.nan
+    if len(values) >= length:
+        table = values.copy()
+        width = 1
+        while width * 2 <= length:
+            reduce(table[:-width], table[width:], out=table[:-width])
+            width *= 2
+        reduce(table[:len(values) - length + 1], table[length - width:len(values) - width + 1], out=out[length - 1:])
+    return out
+
+class BarArrays:
+    __slots__ = ("open", "high", "low", "close", "arrays")
+    
+    def __init__(self, open_, high, low, close):
+        self.open = np.ascontiguousarray(open_, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.arrays = {}
+    
+    @classmethod
+    def from_frame(cls, data):
+        return cls(data["Open"].to_numpy(), data["High"].to_numpy(), data["Low"].to_numpy(), data["Close"].to_numpy())
+    
+    def compute(self, needs):
+        for need in needs:
+            self.get(*need)
+        return self
+    
+    def get(self, name, *params):
+        if name in PRICE_COLUMNS:
+            return getattr(self, name)
+        
+        key = (name,) + params
+        array = self.arrays.get(key)
+        if array is not None:
+            return array
+        
+        out = np.empty(len(self.close))
+        if name == "ema":
+            ema_array(self.close, params[0], out)
+        elif name == "sma":
+            rolling_mean(self.close, params[0], out)
+        elif name == "rsi":
+            rsi_array(self.close, params[0], out)
+        elif name == "atr":
+            atr_array(self.high, self.low, self.close, params[0], out)
+        elif name == "highest":
+            rolling_extreme(self.high, params[0], out, np.maximum)
+        elif name == "lowest":
+            rolling_extreme(self.low, params[0], out, np.minimum)
+        elif name in BAND_SIDES:
+            length, std = params
+            middle = self.get("sma", length)
+            deviation = rolling_std(self.close, length, np.empty(len(self.close)))
+            self.arrays[("bb_middle",) + params] = middle
+            self.arrays[("bb_upper",) + params] = middle + std * deviation
+            self.arrays[("bb_lower",) + params] = middle - std * deviation
+            return self.arrays[key]
+        self.arrays[key] = out
+        return out
+    
+    def value(self, name, *params, ago=0):
+        return float(self.get(name, *params)[-1 - ago])
+
+STREAM_CACHE = {}
+STREAM_LOCK = threading.Lock()
+
+def stream_indicators(pair_symbol, data, interval=INTERVAL):
+    key = (pair_symbol, interval)
+    closed = data.iloc[:-1]
+    
+    with STREAM_LOCK:
+        stream = STREAM_CACHE.get(key)
+        if stream is None or stream.last_time not in closed.index:
+            stream = StreamingIndicators(ALL_STRATEGY_INDICATORS).update_frame(closed)
+            STREAM_CACHE[key] = stream
+        else:
+            stream.update_frame(closed[closed.index > stream.last_time])
+        
+        view = stream.anchor(len(closed)).snapshot()
+    
+    return view.update_frame(data.iloc[-1:])
+
+def indicator_view(data):
+    if isinstance(data, pd.DataFrame):
+        return BarArrays.from_frame(data) if INDICATOR_ENGINE == "numpy" else Indicators(data)
+    return data
+
+@METRICS.timed("indicators")
+def get_indicators(pair_symbol, data, interval=INTERVAL):
+    key = (pair_symbol, interval)
+    cached = INDICATOR_CACHE.get(key)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    
+    if INDICATOR_ENGINE == "streaming":
+        indicators = stream_indicators(pair_symbol, data, interval)
+    elif INDICATOR_ENGINE == "numpy":
+        indicators = BarArrays.from_frame(data)
+    else:
+        indicators = Indicators(data)
+    INDICATOR_CACHE[key] = (data, indicators)
+    return indicators
+
+@register_strategy("EMA_RSI", "EMA+RSI", "e_", 4, [("ema", 50), ("ema", 200), ("rsi", 14)])
+@METRICS.timed("strategy")
 def ema_rsi_strategy(data):
-    data["EMA50"] = ta.ema(data["Close"], length=50)
-    data["EMA200"] = ta.ema(data["Close"], length=200)
-    data["RSI"] = ta.rsi(data["Close"], length=14)
+    ind = indicator_view(data)
     
-    ema50 = float(data["EMA50"].iloc[-1])
-    ema200 = float(data["EMA200"].iloc[-1])
-    rsi = float(data["RSI"].iloc[-1])
+    ema50 = ind.value("ema", 50)
+    ema200 = ind.value("ema", 200)
+    rsi = ind.value("rsi", 14)
     
-    if ema50 > ema200 and rsi > 40:
+    if ema50 > ema200 and rsi > RSI_BUY_LEVEL:
         return "BUY", f"EMA50: {ema50:.5f}\nEMA200: {ema200:.5f}\nRSI: {rsi:.2f}"
-    elif ema50 < ema200 and rsi < 60:
+    elif ema50 < ema200 and rsi < RSI_SELL_LEVEL:
         return "SELL", f"EMA50: {ema50:.5f}\nEMA200: {ema200:.5f}\nRSI: {rsi:.2f}"
     else:
         return "HOLD", f"EMA50: {ema50:.5f}\nEMA200: {ema200:.5f}\nRSI: {rsi:.2f}"
 
+@register_strategy("BREAKOUT", "Breakout", "b_", 3, [("bb_upper", BB_LENGTH, BB_STD), ("bb_middle", BB_LENGTH, BB_STD), ("bb_lower", BB_LENGTH, BB_STD), ("atr", ATR_LENGTH)])
+@METRICS.timed("strategy")
 def breakout_strategy(data):
-    bbands = ta.bbands(data["Close"], length=20, std=2)
-    data["BB_Upper"] = bbands['BBU_20_2.0']
-    data["BB_Lower"] = bbands['BBL_20_2.0']
-    data["BB_Middle"] = bbands['BBM_20_2.0']
+    ind = indicator_view(data)
     
-    data["ATR"] = ta.atr(data["High"], data["Low"], data["Close"], length=14)
+    price = ind.value("close")
+    bb_upper = ind.value("bb_upper", BB_LENGTH, BB_STD)
+    bb_lower = ind.value("bb_lower", BB_LENGTH, BB_STD)
+    bb_middle = ind.value("bb_middle", BB_LENGTH, BB_STD)
+    atr = ind.value("atr", ATR_LENGTH)
     
-    price = float(data["Close"].iloc[-1])
-    bb_upper = float(data["BB_Upper"].iloc[-1])
-    bb_lower = float(data["BB_Lower"].iloc[-1])
-    bb_middle = float(data["BB_Middle"].iloc[-1])
-    atr = float(data["ATR"].iloc[-1])
-    
-    prev_close = float(data["Close"].iloc[-2])
+    prev_close = ind.value("close", ago=1)
     
     if prev_close < bb_upper and price >= bb_upper and atr > 0:
         return "BUY", f"Breakout Above BB Upper\nPrice: {price:.5f}\nBB Upper: {bb_upper:.5f}\nBB Middle: {bb_middle:.5f}\nATR: {atr:.5f}"
@@ -96,14 +1255,15 @@ def breakout_strategy(data):
     else:
         return "HOLD", f"No Breakout\nPrice: {price:.5f}\nBB Upper: {bb_upper:.5f}\nBB Lower: {bb_lower:.5f}"
 
+@register_strategy("MA_CROSSOVER", "MA Crossover", "m_", 2, [("sma", 20), ("sma", 50)])
+@METRICS.timed("strategy")
 def ma_crossover_strategy(data):
-    data["SMA20"] = ta.sma(data["Close"], length=20)
-    data["SMA50"] = ta.sma(data["Close"], length=50)
+    ind = indicator_view(data)
     
-    sma20_curr = float(data["SMA20"].iloc[-1])
-    sma50_curr = float(data["SMA50"].iloc[-1])
-    sma20_prev = float(data["SMA20"].iloc[-2])
-    sma50_prev = float(data["SMA50"].iloc[-2])
+    sma20_curr = ind.value("sma", 20)
+    sma50_curr = ind.value("sma", 50)
+    sma20_prev = ind.value("sma", 20, ago=1)
+    sma50_prev = ind.value("sma", 50, ago=1)
     
     if sma20_prev <= sma50_prev and sma20_curr > sma50_curr:
         return "BUY", f"Bullish MA Crossover\nSMA20: {sma20_curr:.5f}\nSMA50: {sma50_curr:.5f}\nCrossover detected!"
@@ -112,39 +1272,42 @@ def ma_crossover_strategy(data):
     else:
         return "HOLD", f"No Crossover\nSMA20: {sma20_curr:.5f}\nSMA50: {sma50_curr:.5f}"
 
+@register_strategy("FIBONACCI", "Fibonacci", "f_", 1, [("highest", 14), ("lowest", 14)])
+@METRICS.timed("strategy")
 def fibonacci_strategy(data):
-    high_14 = float(data["High"].tail(14).max())
-    low_14 = float(data["Low"].tail(14).min())
-    price = float(data["Close"].iloc[-1])
+    ind = indicator_view(data)
+    
+    high_14 = ind.value("highest", 14)
+    low_14 = ind.value("lowest", 14)
+    price = ind.value("close")
     
     diff = high_14 - low_14
-    fib_236 = high_14 - (diff * 0.236)
+    fib_sell = high_14 - (diff * FIB_SELL_LEVEL)
     fib_382 = high_14 - (diff * 0.382)
-    fib_618 = high_14 - (diff * 0.618)
+    fib_buy = high_14 - (diff * FIB_BUY_LEVEL)
     
-    if price <= fib_618 and price > low_14:
-        return "BUY", f"Fibonacci Buy Zone (61.8%)\nPrice: {price:.5f}\nFib 61.8%: {fib_618:.5f}\nFib 38.2%: {fib_382:.5f}\nFib 23.6%: {fib_236:.5f}"
-    elif price >= fib_236:
-        return "SELL", f"Fibonacci Sell Zone (23.6%)\nPrice: {price:.5f}\nFib 23.6%: {fib_236:.5f}\nFib 38.2%: {fib_382:.5f}"
+    if price <= fib_buy and price > low_14:
+        return "BUY", f"Fibonacci Buy Zone ({FIB_BUY_LEVEL:.1%})\nPrice: {price:.5f}\nFib {FIB_BUY_LEVEL:.1%}: {fib_buy:.5f}\nFib 38.2%: {fib_382:.5f}\nFib {FIB_SELL_LEVEL:.1%}: {fib_sell:.5f}"
+    elif price >= fib_sell:
+        return "SELL", f"Fibonacci Sell Zone ({FIB_SELL_LEVEL:.1%})\nPrice: {price:.5f}\nFib {FIB_SELL_LEVEL:.1%}: {fib_sell:.5f}\nFib 38.2%: {fib_382:.5f}"
     else:
-        return "HOLD", f"Between Fib Levels\nPrice: {price:.5f}\nFib 61.8%: {fib_618:.5f}\nFib 38.2%: {fib_382:.5f}"
+        return "HOLD", f"Between Fib Levels\nPrice: {price:.5f}\nFib {FIB_BUY_LEVEL:.1%}: {fib_buy:.5f}\nFib 38.2%: {fib_382:.5f}"
 
+@register_strategy("PRICE_ACTION", "Price Action", "p_", 2, [("atr", ATR_LENGTH)])
+@METRICS.timed("strategy")
 def price_action_strategy(data):
-    data["ATR"] = ta.atr(data["High"], data["Low"], data["Close"], length=14)
+    ind = indicator_view(data)
     
-    curr_high = float(data["High"].iloc[-1])
-    curr_low = float(data["Low"].iloc[-1])
-    curr_close = float(data["Close"].iloc[-1])
-    prev_high = float(data["High"].iloc[-2])
-    prev_low = float(data["Low"].iloc[-2])
-    prev_close = float(data["Close"].iloc[-2])
-    atr = float(data["ATR"].iloc[-1])
+    curr_open = ind.value("open")
+    curr_close = ind.value("close")
+    prev_high = ind.value("high", ago=1)
+    prev_low = ind.value("low", ago=1)
+    atr = ind.value("atr", ATR_LENGTH)
     
-    body_curr = abs(curr_close - float(data["Open"].iloc[-1]))
-    candle_range = curr_high - curr_low
+    body_curr = abs(curr_close - curr_open)
     
-    is_bullish_engulfing = (curr_close > prev_high and float(data["Open"].iloc[-1]) < prev_low)
-    is_bearish_engulfing = (curr_close < prev_low and float(data["Open"].iloc[-1]) > prev_high)
+    is_bullish_engulfing = (curr_close > prev_high and curr_open < prev_low)
+    is_bearish_engulfing = (curr_close < prev_low and curr_open > prev_high)
     
     if is_bullish_engulfing and body_curr > atr * 0.5:
         return "BUY", f"Bullish Engulfing Pattern\nPrice: {curr_close:.5f}\nATR: {atr:.5f}\nStrong momentum detected"
@@ -153,17 +1316,20 @@ def price_action_strategy(data):
     else:
         return "HOLD", f"No Clear Pattern\nPrice: {curr_close:.5f}\nATR: {atr:.5f}"
 
+@register_strategy("RANGE_TRADING", "Range Trading", "r_", 2, [("highest", 20), ("lowest", 20), ("atr", ATR_LENGTH)])
+@METRICS.timed("strategy")
 def range_trading_strategy(data):
-    high_20 = float(data["High"].tail(20).max())
-    low_20 = float(data["Low"].tail(20).min())
-    price = float(data["Close"].iloc[-1])
+    ind = indicator_view(data)
+    
+    high_20 = ind.value("highest", 20)
+    low_20 = ind.value("lowest", 20)
+    price = ind.value("close")
     
     range_size = high_20 - low_20
-    upper_zone = high_20 - (range_size * 0.2)
-    lower_zone = low_20 + (range_size * 0.2)
+    upper_zone = high_20 - (range_size * RANGE_ZONE)
+    lower_zone = low_20 + (range_size * RANGE_ZONE)
     
-    data["ATR"] = ta.atr(data["High"], data["Low"], data["Close"], length=14)
-    atr = float(data["ATR"].iloc[-1])
+    atr = ind.value("atr", ATR_LENGTH)
     
     if price <= lower_zone and atr < range_size * 0.3:
         return "BUY", f"Range Support (Buy Zone)\nPrice: {price:.5f}\nSupport: {low_20:.5f}\nResistance: {high_20:.5f}\nRange: {range_size:.5f}"
@@ -172,19 +1338,17 @@ def range_trading_strategy(data):
     else:
         return "HOLD", f"Mid-Range\nPrice: {price:.5f}\nSupport: {low_20:.5f}\nResistance: {high_20:.5f}"
 
+@register_strategy("PULLBACK", "Pullback", "pb_", 3, [("ema", 20), ("rsi", 14)])
+@METRICS.timed("strategy")
 def pullback_strategy(data):
-    data["EMA20"] = ta.ema(data["Close"], length=20)
-    data["RSI"] = ta.rsi(data["Close"], length=14)
-    
-    ema20 = float(data["EMA20"].iloc[-1])
-    price = float(data["Close"].iloc[-1])
-    rsi = float(data["RSI"].iloc[-1])
+    ind = indicator_view(data)
     
-    high_10 = float(data["High"].tail(10).max())
-    low_10 = float(data["Low"].tail(10).min())
+    ema20 = ind.value("ema", 20)
+    price = ind.value("close")
+    rsi = ind.value("rsi", 14)
     
-    uptrend = ema20 > float(data["EMA20"].iloc[-10])
-    downtrend = ema20 < float(data["EMA20"].iloc[-10])
+    uptrend = ema20 > ind.value("ema", 20, ago=9)
+    downtrend = ema20 < ind.value("ema", 20, ago=9)
     
     if uptrend and price <= ema20 * 1.005 and rsi < 50:
         return "BUY", f"Bullish Pullback\nPrice: {price:.5f}\nEMA20: {ema20:.5f}\nRSI: {rsi:.2f}\nBuying the dip in uptrend"
@@ -193,125 +1357,527 @@ def pullback_strategy(data):
     else:
         return "HOLD", f"No Pullback\nPrice: {price:.5f}\nEMA20: {ema20:.5f}\nRSI: {rsi:.2f}"
 
-def get_signal(pair_symbol, pip_value, pip_size, strategy_type="BOTH"):
+SIGNAL_CACHE = OrderedDict()
+SIGNAL_CACHE_LOCK = threading.Lock()
+
+def invalidate_signals(pair_symbol, interval, last_bar):
+    with SIGNAL_CACHE_LOCK:
+        for key in [k for k in SIGNAL_CACHE if k[0] == pair_symbol and k[1] == interval and k[3] != last_bar]:
+            del SIGNAL_CACHE[key]
+
+def get_signal(pair_symbol, pip_value, pip_size, strategy_type="BOTH", interval=INTERVAL):
+    try:
+        data = get_bars(pair_symbol, interval)
+    except Exception as e:
+        return None, str(e), 0, 0, 0, 0, "Error"
+    
+    if data.empty:
+        return compute_signal(pair_symbol, pip_value, pip_size, strategy_type, data, interval)
+    
+    key = (pair_symbol, interval, strategy_type, data.index[-1])
+    with SIGNAL_CACHE_LOCK:
+        if key in SIGNAL_CACHE:
+            SIGNAL_CACHE.move_to_end(key)
+            METRICS.incr("signal_cache_hits")
+            return SIGNAL_CACHE[key]
+    
+    METRICS.incr("signal_cache_misses")
+    result = compute_signal(pair_symbol, pip_value, pip_size, strategy_type, data, interval)
+    if result[0] is not None:
+        with SIGNAL_CACHE_LOCK:
+            SIGNAL_CACHE[key] = result
+            while len(SIGNAL_CACHE) > SIGNAL_CACHE_SIZE:
+                SIGNAL_CACHE.popitem(last=False)
+    return result
+
+def compute_signal(pair_symbol, pip_value, pip_size, strategy_type, data, interval=INTERVAL):
     try:
-        data = yf.download(pair_symbol, period="5d", interval=INTERVAL, progress=False)
-        
         if data.empty or len(data) < 200:
             return None, f"Not enough data ({len(data)} rows)", 0, 0, 0, 0, "N/A"
         
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
-        
-        price = float(data["Close"].iloc[-1])
-        lot_size = calculate_lot_size(pip_value, pip_size)
+        ind = get_indicators(pair_symbol, data, interval)
+        price = ind.value("close")
+        stop_pips, target_pips = risk_pips(ind.value("atr", ATR_LENGTH), pip_size)
+        lot_size = calculate_lot_size(pip_value, pip_size, stop_pips)
         
         signals = []
-        
-        if strategy_type in ["EMA_RSI", "BOTH"]:
-            ema_signal, ema_details = ema_rsi_strategy(data.copy())
-            if ema_signal != "HOLD":
-                signals.append(("EMA+RSI", ema_signal, ema_details))
-        
-        if strategy_type in ["BREAKOUT", "BOTH"]:
-            breakout_signal, breakout_details = breakout_strategy(data.copy())
-            if breakout_signal != "HOLD":
-                signals.append(("Breakout", breakout_signal, breakout_details))
-        
-        if strategy_type == "MA_CROSSOVER":
-            ma_signal, ma_details = ma_crossover_strategy(data.copy())
-            if ma_signal != "HOLD":
-                signals.append(("MA Crossover", ma_signal, ma_details))
-        
-        if strategy_type == "FIBONACCI":
-            fib_signal, fib_details = fibonacci_strategy(data.copy())
-            if fib_signal != "HOLD":
-                signals.append(("Fibonacci", fib_signal, fib_details))
-        
-        if strategy_type == "PRICE_ACTION":
-            pa_signal, pa_details = price_action_strategy(data.copy())
-            if pa_signal != "HOLD":
-                signals.append(("Price Action", pa_signal, pa_details))
-        
-        if strategy_type == "RANGE_TRADING":
-            range_signal, range_details = range_trading_strategy(data.copy())
-            if range_signal != "HOLD":
-                signals.append(("Range Trading", range_signal, range_details))
-        
-        if strategy_type == "PULLBACK":
-            pullback_signal, pullback_details = pullback_strategy(data.copy())
-            if pullback_signal != "HOLD":
-                signals.append(("Pullback", pullback_signal, pullback_details))
+        for mode_type in STRATEGY_MODES.get(strategy_type, []):
+            mode_name, strategy = STRATEGY_REGISTRY[mode_type][:2]
+            mode_signal, mode_details = strategy(ind)
+            if mode_signal != "HOLD":
+                signals.append((mode_name, mode_signal, mode_details))
         
         if len(signals) == 2 and signals[0][1] == signals[1][1]:
             signal = signals[0][1]
-            strategy_name = "EMA+RSI & Breakout (STRONG)"
+            strategy_name = f"{signals[0][0]} & {signals[1][0]} (STRONG)"
             details = f"Entry: {price:.5f}\n\n✅ BOTH STRATEGIES AGREE ✅\n\n{signals[0][2]}\n\n{signals[1][2]}"
         elif len(signals) >= 1:
             strategy_name = signals[0][0]
             signal = signals[0][1]
-            sl, tp = calculate_tp_sl(price, signal, pip_size)
+            sl, tp = calculate_tp_sl(price, signal, pip_size, stop_pips, target_pips)
             details = f"Entry: {price:.5f}\nSL: {sl:.5f}\nTP: {tp:.5f}\n\n{signals[0][2]}"
             return signal, details, lot_size, price, sl, tp, strategy_name
         else:
             return "HOLD", f"Price: {price:.5f}\nNo signals from any strategy", lot_size, price, 0, 0, "None"
         
-        sl, tp = calculate_tp_sl(price, signal, pip_size)
+        sl, tp = calculate_tp_sl(price, signal, pip_size, stop_pips, target_pips)
         return signal, details, lot_size, price, sl, tp, strategy_name
         
     except Exception as e:
         return None, str(e), 0, 0, 0, 0, "Error"
 
-def get_all_strategy_signals(pair_symbol, pip_value, pip_size):
+ALL_STRATEGIES = [(strategy_name, func) for strategy_name, func, _, _, _ in STRATEGY_REGISTRY.values()]
+STRATEGY_INDICATORS = {strategy_type: needs for strategy_type, (_, _, _, _, needs) in STRATEGY_REGISTRY.items()}
+ALL_STRATEGY_INDICATORS = list(dict.fromkeys(need for needs in STRATEGY_INDICATORS.values() for need in needs))
+STRATEGY_MODES = {"BOTH": ["EMA_RSI", "BREAKOUT"], **{strategy_type: [strategy_type] for strategy_type in STRATEGY_REGISTRY}}
+PAIR_COMMANDS = {
+    f"{prefix}{pair_key}": (pair_key, strategy_type)
+    for strategy_type, (_, _, prefix, _, _) in STRATEGY_REGISTRY.items()
+    for pair_key in PAIRS
+}
+PAIR_COMMANDS.update({pair_key: (pair_key, "BOTH") for pair_key in PAIRS})
+
+def evaluate_strategies(data, strategies=ALL_STRATEGIES):
+    ind = indicator_view(data)
+    signals = []
+    for strategy_name, strategy in strategies:
+        signal, details = strategy(ind)
+        if signal != "HOLD":
+            signals.append((strategy_name, signal, details))
+    return signals
+
+STRATEGY_BY_NAME = dict(ALL_STRATEGIES)
+STRATEGY_COSTS = {strategy_name: cost for strategy_name, _, _, cost, _ in STRATEGY_REGISTRY.values()}
+STRATEGY_STATS = {strategy_name: [0, 0] for strategy_name, _ in ALL_STRATEGIES}
+STRATEGY_STATS_LOCK = threading.Lock()
+
+def record_strategy_stats(evaluated, signals):
+    fired = {s[0] for s in signals}
+    with STRATEGY_STATS_LOCK:
+        for strategy_name in evaluated:
+            STRATEGY_STATS[strategy_name][0] += 1
+            STRATEGY_STATS[strategy_name][1] += strategy_name in fired
+
+def sure_shot_order():
+    with STRATEGY_STATS_LOCK:
+        hold_rates = {name: (runs - fired + 1) / (runs + 2) for name, (runs, fired) in STRATEGY_STATS.items()}
+    return sorted(STRATEGY_BY_NAME, key=lambda name: STRATEGY_COSTS[name] / hold_rates[name])
+
+def evaluate_sure_shot(data, order):
+    ind = indicator_view(data)
+    signals = []
+    buys = sells = 0
+    for i, strategy_name in enumerate(order):
+        signal, details = STRATEGY_BY_NAME[strategy_name](ind)
+        if signal != "HOLD":
+            signals.append((strategy_name, signal, details))
+            buys += signal == "BUY"
+            sells += signal == "SELL"
+        
+        if max(buys, sells) + len(order) - i - 1 < SURE_SHOT_MIN_STRATEGIES:
+            return [], order[:i + 1], math.nan
+        if max(buys, sells) >= SURE_SHOT_MIN_STRATEGIES:
+            for strategy_name in order[i + 1:]:
+                signal, details = STRATEGY_BY_NAME[strategy_name](ind)
+                if signal != "HOLD":
+                    signals.append((strategy_name, signal, details))
+            break
+    
+    rank = {strategy_name: i for i, (strategy_name, _) in enumerate(ALL_STRATEGIES)}
+    return sorted(signals, key=lambda s: rank[s[0]]), order, ind.value("atr", ATR_LENGTH)
+
+def get_sure_shot_signals(pair_symbol, interval=INTERVAL):
     try:
-        data = yf.download(pair_symbol, period="5d", interval=INTERVAL, progress=False)
+        data = get_bars(pair_symbol, interval)
         
         if data.empty or len(data) < 200:
-            return None, []
+            return None, [], math.nan
         
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
+        order = sure_shot_order()
+        if STRATEGY_PROCESSES > 0:
+            price = float(data["Close"].iloc[-1])
+            signals, evaluated, atr = get_strategy_pool().submit(evaluate_sure_shot, data, order).result()
+        else:
+            ind = get_indicators(pair_symbol, data, interval)
+            price = ind.value("close")
+            signals, evaluated, atr = evaluate_sure_shot(ind, order)
         
-        price = float(data["Close"].iloc[-1])
-        lot_size = calculate_lot_size(pip_value, pip_size)
+        record_strategy_stats(evaluated, signals)
+        if len(evaluated) < len(order):
+            METRICS.incr("sure_shot_early_exits")
+        return price, signals, atr
         
-        all_signals = []
+    except Exception as e:
+        return None, [], math.nan
+
+def get_strategy_pool():
+    global STRATEGY_POOL
+    if STRATEGY_POOL is None:
+        STRATEGY_POOL = ProcessPoolExecutor(max_workers=STRATEGY_PROCESSES)
+    return STRATEGY_POOL
+
+def get_all_strategy_signals(pair_symbol, pip_value, pip_size, interval=INTERVAL):
+    try:
+        data = get_bars(pair_symbol, interval)
         
-        ema_signal, ema_details = ema_rsi_strategy(data.copy())
-        if ema_signal != "HOLD":
-            all_signals.append(("EMA+RSI", ema_signal, ema_details))
+        if data.empty or len(data) < 200:
+            return None, []
         
-        breakout_signal, breakout_details = breakout_strategy(data.copy())
-        if breakout_signal != "HOLD":
-            all_signals.append(("Breakout", breakout_signal, breakout_details))
+        if STRATEGY_PROCESSES > 0:
+            price = float(data["Close"].iloc[-1])
+            all_signals = get_strategy_pool().submit(evaluate_strategies, data).result()
+        else:
+            ind = get_indicators(pair_symbol, data, interval).compute(ALL_STRATEGY_INDICATORS)
+            price = ind.value("close")
+            all_signals = evaluate_strategies(ind)
+        
+        return price, all_signals
         
-        ma_signal, ma_details = ma_crossover_strategy(data.copy())
-        if ma_signal != "HOLD":
-            all_signals.append(("MA Crossover", ma_signal, ma_details))
+    except Exception as e:
+        return None, []
+
+def confirm_timeframes(pair_symbol, pip_value, pip_size, direction, interval=INTERVAL):
+    lines = []
+    for higher in MTF_INTERVALS:
+        if interval_seconds(higher) <= interval_seconds(interval):
+            continue
         
-        fib_signal, fib_details = fibonacci_strategy(data.copy())
-        if fib_signal != "HOLD":
-            all_signals.append(("Fibonacci", fib_signal, fib_details))
+        _, higher_signals = get_all_strategy_signals(pair_symbol, pip_value, pip_size, higher)
+        agree = len([s for s in higher_signals if s[1] == direction])
+        oppose = len(higher_signals) - agree
+        if agree < MTF_MIN_AGREE or oppose >= agree:
+            return False, ""
+        lines.append(f"{higher}: {agree}/{len(ALL_STRATEGIES)} agree")
+    
+    if not lines:
+        return True, ""
+    return True, f"\n🕐 Timeframes: {' | '.join(lines)}\n"
+
+class Position:
+    def __init__(self, symbol, signal, entry, sl, tp, lot_size, risk, opened):
+        self.symbol = symbol
+        self.signal = signal
+        self.entry = entry
+        self.sl = sl
+        self.tp = tp
+        self.lot_size = lot_size
+        self.risk = risk
+        self.opened = opened
+
+class PortfolioRisk:
+    def __init__(self, symbols, window):
+        self.symbols = list(symbols)
+        self.column = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.returns = np.zeros((window, len(self.symbols)))
+        self.sums = np.zeros(len(self.symbols))
+        self.products = np.zeros((len(self.symbols), len(self.symbols)))
+        self.count = 0
+        self.cursor = 0
+        self.pushed = 0
+        self.last_time = None
+        self.last_close = np.full(len(self.symbols), np.nan)
+        self.matrix = None
+        self.positions = {}
+        self.lock = threading.Lock()
+    
+    def budget(self):
+        return ACCOUNT_BALANCE * PORTFOLIO_RISK_PERCENT / 100
+    
+    def seed(self, closes):
+        returns = np.nan_to_num(np.log(closes.to_numpy()[1:] / closes.to_numpy()[:-1]))[-self.window:]
+        self.count = len(returns)
+        self.cursor = self.count % self.window
+        self.returns[:self.count] = returns
+        self.sums = returns.sum(axis=0)
+        self.products = returns.T @ returns
+    
+    def push(self, row):
+        if self.count == self.window:
+            old = self.returns[self.cursor]
+            self.sums -= old
+            self.products -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.returns[self.cursor] = row
+        self.sums += row
+        self.products += np.outer(row, row)
+        self.cursor = (self.cursor + 1) % self.window
+        self.pushed += 1
         
-        pa_signal, pa_details = price_action_strategy(data.copy())
-        if pa_signal != "HOLD":
-            all_signals.append(("Price Action", pa_signal, pa_details))
+        if self.pushed % self.window == 0:
+            active = self.returns[:self.count]
+            self.sums = active.sum(axis=0)
+            self.products = active.T @ active
+    
+    def observe(self, frames):
+        closes = {
+            symbol: frame["Close"] if self.last_time is None else frame["Close"][frame.index > self.last_time]
+            for symbol, frame in frames.items() if symbol in self.column and not frame.empty
+        }
+        with self.lock:
+            if closes:
+                closes = pd.concat(closes, axis=1).reindex(columns=self.symbols).sort_index()
+            if len(closes) and self.last_time is None:
+                closes = closes.ffill()
+                self.seed(closes)
+            elif len(closes):
+                closes = closes.ffill().fillna(pd.Series(self.last_close, index=self.symbols))
+                prices = closes.to_numpy()
+                previous = np.vstack([self.last_close, prices[:-1]])
+                for row in np.nan_to_num(np.log(prices / previous)):
+                    self.push(row)
+            
+            if len(closes):
+                self.last_time = closes.index[-1]
+                self.last_close = closes.iloc[-1].to_numpy()
+                self.matrix = None
+            self.close_positions(frames)
+    
+    def close_positions(self, frames):
+        for key, position in list(self.positions.items()):
+            frame = frames.get(position.symbol)
+            if frame is None or frame.empty:
+                continue
+            
+            bars = frame[frame.index > pd.Timestamp(position.opened - interval_seconds(CORRELATION_INTERVAL), unit="s", tz="UTC")]
+            if position.signal == "BUY":
+                stopped = (bars["Low"] <= position.sl).any()
+                target = (bars["High"] >= position.tp).any()
+            else:
+                stopped = (bars["High"] >= position.sl).any()
+                target = (bars["Low"] <= position.tp).any()
+            
+            if stopped or target:
+                del self.positions[key]
+                METRICS.incr("positions_closed", outcome="SL" if stopped else "TP")
+        METRICS.gauge("open_positions", len(self.positions))
+    
+    def correlation(self):
+        if self.matrix is None:
+            if self.count < 2:
+                self.matrix = np.eye(len(self.symbols))
+            else:
+                mean = self.sums / self.count
+                cov = self.products / self.count - np.outer(mean, mean)
+                std = np.sqrt(np.clip(np.diag(cov), 0, None))
+                scale = np.outer(std, std)
+                matrix = np.divide(cov, scale, out=np.zeros_like(cov), where=scale > 0)
+                np.fill_diagonal(matrix, 1)
+                self.matrix = np.clip(matrix, -1, 1)
+        return self.matrix
+    
+    def exposure(self):
+        weights = np.zeros(len(self.symbols))
+        for position in self.positions.values():
+            weights[self.column[position.symbol]] += position.risk if position.signal == "BUY" else -position.risk
+        return weights
+    
+    def total_risk(self, weights=None):
+        weights = self.exposure() if weights is None else weights
+        return math.sqrt(max(weights @ self.correlation() @ weights, 0))
+    
+    def allocate(self, key, entry, sl, tp, lot_size, pip_value, pip_size, stop_pips=STOP_LOSS_PIPS):
+        pair_symbol, signal = key[0], key[3]
+        if PORTFOLIO_RISK_PERCENT <= 0 or pair_symbol not in self.column:
+            return lot_size, 0
         
-        range_signal, range_details = range_trading_strategy(data.copy())
-        if range_signal != "HOLD":
-            all_signals.append(("Range Trading", range_signal, range_details))
+        unit_risk = stop_pips * pip_value * pip_size
+        with self.lock:
+            matrix = self.correlation()
+            i = self.column[pair_symbol]
+            weights = self.exposure()
+            full = (1 if signal == "BUY" else -1) * lot_size * unit_risk
+            
+            a = full * full
+            b = 2 * full * (matrix[i] @ weights)
+            c = weights @ matrix @ weights - self.budget() ** 2
+            disc = b * b - 4 * a * c
+            scale = 0
+            if a > 0 and disc >= 0:
+                low = (-b - math.sqrt(disc)) / (2 * a)
+                high = (-b + math.sqrt(disc)) / (2 * a)
+                if high >= 0 and low <= 1:
+                    scale = min(1, high)
+            
+            lot = math.floor(lot_size * scale * 100 + 1e-9) / 100
+            if lot < MIN_LOT_SIZE:
+                METRICS.incr("positions_suppressed", pair=pair_symbol)
+                return 0, self.total_risk()
+            if lot < lot_size:
+                METRICS.incr("positions_scaled", pair=pair_symbol)
+            
+            self.positions[key] = Position(pair_symbol, signal, entry, sl, tp, lot, lot * unit_risk, PROVIDER.now())
+            weights[i] += full * lot / lot_size
+            risk = self.total_risk(weights)
+            METRICS.gauge("portfolio_risk", risk)
+            METRICS.gauge("open_positions", len(self.positions))
+            return lot, risk
+    
+    def release(self, key):
+        with self.lock:
+            if self.positions.pop(key, None) is not None:
+                METRICS.gauge("portfolio_risk", self.total_risk())
+                METRICS.gauge("open_positions", len(self.positions))
+
+portfolio = None
+PORTFOLIO_LOCK = threading.Lock()
+
+def get_portfolio():
+    global portfolio
+    with PORTFOLIO_LOCK:
+        if portfolio is None:
+            portfolio = PortfolioRisk([pair[0] for pair in PAIRS.values()], CORRELATION_WINDOW)
+    return portfolio
+
+def last_bar_time(pair_symbol, interval=INTERVAL):
+    return int(get_bars(pair_symbol, interval).index[-1].timestamp())
+
+class SignalJournal:
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.lock = threading.Lock()
+        self.thread = None
+    
+    def connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(JOURNAL_SCHEMA)
+        return self.db
+    
+    def record(self, pair_symbol, interval, bar_time, signal, kind, strategy, entry, sl, tp):
+        if not self.path:
+            return True
+        with self.lock:
+            db = self.connect()
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO signals (pair, interval, bar_time, signal, kind, strategy, entry, sl, tp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (pair_symbol, interval, bar_time, signal, kind, strategy, entry, sl, tp)
+            )
+            db.commit()
+        if cursor.rowcount == 0:
+            METRICS.incr("duplicate_signals", kind=kind)
+        return cursor.rowcount > 0
+    
+    def mark_sent(self, key, lot_size):
+        if not self.path:
+            return
+        with self.lock:
+            db = self.connect()
+            db.execute(
+                "UPDATE signals SET lot_size = ?, sent_at = ? WHERE pair = ? AND interval = ? AND bar_time = ? AND signal = ? AND kind = ?",
+                (lot_size, PROVIDER.now()) + key
+            )
+            db.commit()
+    
+    def discard(self, key):
+        if not self.path:
+            return
+        with self.lock:
+            db = self.connect()
+            db.execute(
+                "DELETE FROM signals WHERE pair = ? AND interval = ? AND bar_time = ? AND signal = ? AND kind = ? AND sent_at IS NULL",
+                key
+            )
+            db.commit()
+    
+    def resolve_batch(self, rows):
+        groups = {}
+        for row in rows:
+            groups.setdefault((row[1], row[2]), []).append(row)
         
-        pullback_signal, pullback_details = pullback_strategy(data.copy())
-        if pullback_signal != "HOLD":
-            all_signals.append(("Pullback", pullback_signal, pullback_details))
+        updates = []
+        for (pair_symbol, interval), signals in groups.items():
+            try:
+                data = get_bars(pair_symbol, interval)
+            except Exception as e:
+                print(f"Journal resolver error for {pair_symbol} ({interval}): {e}")
+                continue
+            if data.empty:
+                continue
+            
+            times = data.index.as_unit("s").asi8
+            highs = data["High"].to_numpy()
+            lows = data["Low"].to_numpy()
+            for signal_id, _, _, bar_time, signal, sl, tp in signals:
+                if bar_time < times[0]:
+                    updates.append(("EXPIRED", None, signal_id))
+                    continue
+                
+                start = np.searchsorted(times, bar_time, side="right")
+                if signal == "BUY":
+                    stopped = lows[start:] <= sl
+                    target = highs[start:] >= tp
+                else:
+                    stopped = highs[start:] >= sl
+                    target = lows[start:] <= tp
+                hits = np.flatnonzero(stopped | target)
+                if len(hits):
+                    first = hits[0]
+                    updates.append(("SL" if stopped[first] else "TP", int(times[start + first]), signal_id))
         
-        return price, all_signals
+        if updates:
+            with self.lock:
+                db = self.connect()
+                db.executemany("UPDATE signals SET outcome = ?, resolved_bar = ? WHERE id = ?", updates)
+                db.commit()
+            for outcome, _, _ in updates:
+                METRICS.incr("signals_resolved", outcome=outcome)
+        return len(updates)
+    
+    def resolve(self):
+        if not self.path:
+            return 0
         
-    except Exception as e:
-        return None, []
+        resolved = 0
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.connect().execute(
+                    "SELECT id, pair, interval, bar_time, signal, sl, tp FROM signals WHERE outcome IS NULL AND sent_at IS NOT NULL AND id > ? ORDER BY id LIMIT ?",
+                    (last_id, JOURNAL_RESOLVE_BATCH)
+                ).fetchall()
+            if not rows:
+                return resolved
+            resolved += self.resolve_batch(rows)
+            last_id = rows[-1][0]
+            if len(rows) < JOURNAL_RESOLVE_BATCH:
+                return resolved
+    
+    def stats(self):
+        if not self.path:
+            return []
+        with self.lock:
+            return self.connect().execute(
+                "SELECT CASE WHEN kind = 'SURE_SHOT' THEN 'Sure Shot' ELSE strategy END AS name, COUNT(*), "
+                "SUM(outcome IS 'TP'), SUM(outcome IS 'SL'), SUM(outcome IS NULL) "
+                "FROM signals WHERE sent_at IS NOT NULL GROUP BY name ORDER BY COUNT(*) DESC"
+            ).fetchall()
+    
+    def run(self):
+        while True:
+            PROVIDER.sleep(JOURNAL_RESOLVE_INTERVAL)
+            try:
+                with METRICS.timer("journal_resolve"):
+                    resolved = self.resolve()
+                if resolved:
+                    print(f"📒 Journal: resolved {resolved} signal(s)")
+            except Exception as e:
+                print(f"Journal resolver error: {e}")
+    
+    def start(self):
+        if self.path and self.thread is None:
+            self.connect()
+            self.thread = threading.Thread(target=self.run, name="journal-resolver", daemon=True)
+            self.thread.start()
+
+JOURNAL = SignalJournal(SIGNAL_JOURNAL)
 
-def check_sure_shot_signal(pair_symbol, pair_name, pip_value, pip_size):
-    price, all_signals = get_all_strategy_signals(pair_symbol, pip_value, pip_size)
+def check_sure_shot_signal(pair_symbol, pair_name, pip_value, pip_size, interval=INTERVAL, chat_id=None):
+    price, all_signals, atr = get_sure_shot_signals(pair_symbol, interval)
     
     if not all_signals or len(all_signals) < SURE_SHOT_MIN_STRATEGIES:
         return None
@@ -320,68 +1886,302 @@ def check_sure_shot_signal(pair_symbol, pair_name, pip_value, pip_size):
     sell_signals = [s for s in all_signals if s[1] == "SELL"]
     
     if len(buy_signals) >= SURE_SHOT_MIN_STRATEGIES:
-        strategy_names = ", ".join([s[0] for s in buy_signals])
-        sl, tp = calculate_tp_sl(price, "BUY", pip_size)
-        lot_size = calculate_lot_size(pip_value, pip_size)
-        
-        msg = f"🔥🔥 SURE SHOT SIGNAL 🔥🔥\n\n"
-        msg += f"💱 {pair_name} (15m)\n"
-        msg += f"📊 Signal: BUY 🟢\n"
-        msg += f"✅ Confidence: {len(buy_signals)}/{len(all_signals)} Strategies Agree\n\n"
-        msg += f"💰 Entry: {price:.5f}\n"
-        msg += f"🛑 Stop Loss: {sl:.5f} ({STOP_LOSS_PIPS} pips)\n"
-        msg += f"🎯 Take Profit: {tp:.5f} ({TAKE_PROFIT_PIPS} pips)\n"
-        msg += f"📦 Lot Size: {lot_size}\n\n"
-        msg += f"📈 Agreeing Strategies:\n"
-        for i, signal in enumerate(buy_signals, 1):
-            msg += f"{i}. {signal[0]}\n"
-        msg += f"\n⚡ Risk:Reward = 1:{TAKE_PROFIT_PIPS/STOP_LOSS_PIPS:.1f}"
-        msg += f"\n💵 Risk: {RISK_PERCENT}% (${ACCOUNT_BALANCE * RISK_PERCENT / 100:.2f})"
-        
-        return msg
-    
+        direction, agreeing = "BUY", buy_signals
     elif len(sell_signals) >= SURE_SHOT_MIN_STRATEGIES:
-        strategy_names = ", ".join([s[0] for s in sell_signals])
-        sl, tp = calculate_tp_sl(price, "SELL", pip_size)
-        lot_size = calculate_lot_size(pip_value, pip_size)
-        
-        msg = f"🔥🔥 SURE SHOT SIGNAL 🔥🔥\n\n"
-        msg += f"💱 {pair_name} (15m)\n"
-        msg += f"📊 Signal: SELL 🔴\n"
-        msg += f"✅ Confidence: {len(sell_signals)}/{len(all_signals)} Strategies Agree\n\n"
-        msg += f"💰 Entry: {price:.5f}\n"
-        msg += f"🛑 Stop Loss: {sl:.5f} ({STOP_LOSS_PIPS} pips)\n"
-        msg += f"🎯 Take Profit: {tp:.5f} ({TAKE_PROFIT_PIPS} pips)\n"
-        msg += f"📦 Lot Size: {lot_size}\n\n"
-        msg += f"📉 Agreeing Strategies:\n"
-        for i, signal in enumerate(sell_signals, 1):
-            msg += f"{i}. {signal[0]}\n"
-        msg += f"\n⚡ Risk:Reward = 1:{TAKE_PROFIT_PIPS/STOP_LOSS_PIPS:.1f}"
-        msg += f"\n💵 Risk: {RISK_PERCENT}% (${ACCOUNT_BALANCE * RISK_PERCENT / 100:.2f})"
-        
-        return msg
+        direction, agreeing = "SELL", sell_signals
+    else:
+        return None
     
-    return None
+    strategy_names = ", ".join([s[0] for s in agreeing])
+    confirmed, timeframe_lines = confirm_timeframes(pair_symbol, pip_value, pip_size, direction, interval)
+    if not confirmed:
+        return None
+    
+    stop_pips, target_pips = risk_pips(atr, pip_size)
+    sl, tp = calculate_tp_sl(price, direction, pip_size, stop_pips, target_pips)
+    key = (pair_symbol, interval, last_bar_time(pair_symbol, interval), direction, "SURE_SHOT")
+    if not JOURNAL.record(*key, strategy_names, price, sl, tp):
+        return None
+    
+    lot_size, portfolio_risk = get_portfolio().allocate(key, price, sl, tp, calculate_lot_size(pip_value, pip_size, stop_pips), pip_value, pip_size, stop_pips)
+    if not lot_size:
+        JOURNAL.discard(key)
+        print(f"🛡️ SURE SHOT {pair_name} {direction} suppressed: portfolio risk budget used")
+        return None
+    
+    msg = f"🔥🔥 SURE SHOT SIGNAL 🔥🔥\n\n"
+    msg += f"💱 {pair_name} ({interval})\n"
+    msg += f"📊 Signal: {direction} {'🟢' if direction == 'BUY' else '🔴'}\n"
+    msg += f"✅ Confidence: {len(agreeing)}/{len(all_signals)} Strategies Agree\n\n"
+    msg += f"💰 Entry: {price:.5f}\n"
+    msg += f"🛑 Stop Loss: {sl:.5f} ({stop_pips:g} pips)\n"
+    msg += f"🎯 Take Profit: {tp:.5f} ({target_pips:g} pips)\n"
+    msg += f"📦 Lot Size: {lot_size}\n\n"
+    msg += f"{'📈' if direction == 'BUY' else '📉'} Agreeing Strategies:\n"
+    for i, signal in enumerate(agreeing, 1):
+        msg += f"{i}. {signal[0]}\n"
+    msg += timeframe_lines
+    msg += f"\n⚡ Risk:Reward = 1:{target_pips/stop_pips:.1f}"
+    msg += f"\n💵 Risk: {RISK_PERCENT}% (${ACCOUNT_BALANCE * RISK_PERCENT / 100:.2f})"
+    if PORTFOLIO_RISK_PERCENT > 0:
+        msg += f"\n🛡️ Portfolio Risk: ${portfolio_risk:.2f} / ${get_portfolio().budget():.2f}"
+    
+    publish_signal(chat_id, msg, key, lot_size)
+    return msg
+
+class OutboundMessage:
+    def __init__(self, text, ready_at, attempts=0, done=()):
+        self.text = text
+        self.ready_at = ready_at
+        self.attempts = attempts
+        self.done = list(done)
 
-def send_signal(pair_name, signal, details, lot_size, strategy_name, chat_id, entry=None, sl=None, tp=None):
-    msg = f"💱 {pair_name} 15m\n\n"
+class TelegramSender:
+    def __init__(self):
+        self.queues = OrderedDict()
+        self.chat_limits = {}
+        self.global_limit = TokenBucket(SEND_GLOBAL_RATE, SEND_GLOBAL_RATE)
+        self.condition = threading.Condition()
+        self.thread = None
+    
+    def enqueue(self, chat_id, text, done=None):
+        with self.condition:
+            self.queues.setdefault(chat_id, deque()).append(OutboundMessage(text, time.monotonic() + SEND_LINGER, done=[done] if done else []))
+            METRICS.gauge("send_queue_depth", sum(len(q) for q in self.queues.values()))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="telegram-sender", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+    
+    def take_batch(self, queue):
+        now = time.monotonic()
+        batch = [queue.popleft()]
+        length = len(batch[0].text)
+        while queue and queue[0].ready_at <= now:
+            length += len(MERGED_MESSAGE_SEPARATOR) + len(queue[0].text)
+            if length > TELEGRAM_MESSAGE_LIMIT:
+                break
+            batch.append(queue.popleft())
+        return batch
+    
+    def next_batch(self):
+        wait = None
+        for chat_id, queue in self.queues.items():
+            if not queue:
+                continue
+            
+            ready_in = queue[0].ready_at - time.monotonic()
+            if ready_in <= 0:
+                limit = self.chat_limits.setdefault(chat_id, TokenBucket(SEND_CHAT_RATE, 1))
+                ready_in = limit.try_acquire()
+            if ready_in <= 0:
+                self.queues.move_to_end(chat_id)
+                return chat_id, self.take_batch(queue), None
+            wait = ready_in if wait is None else min(wait, ready_in)
+        return None, None, wait
+    
+    def run(self):
+        while True:
+            with self.condition:
+                chat_id, batch, wait = self.next_batch()
+                while batch is None:
+                    self.condition.wait(wait)
+                    chat_id, batch, wait = self.next_batch()
+            
+            self.global_limit.acquire()
+            self.deliver(chat_id, batch)
+    
+    def settle(self, batch, sent):
+        for message in batch:
+            for done in message.done:
+                try:
+                    done(sent)
+                except Exception as e:
+                    print(f"Send callback error: {e}")
+    
+    def deliver(self, chat_id, batch):
+        text = MERGED_MESSAGE_SEPARATOR.join(m.text for m in batch)
+        attempts = max(m.attempts for m in batch) + 1
+        try:
+            with METRICS.timer("telegram_send"):
+                get_bot().send_message(chat_id=chat_id, text=text)
+            METRICS.incr("messages_sent", len(batch))
+            self.settle(batch, True)
+            return
+        except RetryAfter as e:
+            delay = float(e.retry_after)
+        except (BadRequest, Unauthorized) as e:
+            print(f"Dropping message to {chat_id}: {e}")
+            METRICS.incr("messages_dropped", len(batch))
+            self.settle(batch, False)
+            return
+        except NetworkError as e:
+            delay = SEND_BACKOFF * 2 ** (attempts - 1)
+        except Exception as e:
+            print(f"Dropping message to {chat_id}: {e}")
+            METRICS.incr("messages_dropped", len(batch))
+            self.settle(batch, False)
+            return
+        
+        if attempts > SEND_RETRIES:
+            print(f"Giving up on message to {chat_id} after {SEND_RETRIES} retries")
+            METRICS.incr("messages_dropped", len(batch))
+            self.settle(batch, False)
+            return
+        
+        METRICS.incr("send_retries")
+        done = [callback for m in batch for callback in m.done]
+        with self.condition:
+            self.queues.setdefault(chat_id, deque()).appendleft(OutboundMessage(text, time.monotonic() + delay, attempts, done))
+            self.condition.notify()
+
+SENDER = TelegramSender()
+
+def telegram_send(chat_id, text, done=None):
+    SENDER.enqueue(chat_id, text, done)
+
+def publish_signal(chat_id, text, key, lot_size):
+    def done(sent):
+        if sent:
+            JOURNAL.mark_sent(key, lot_size)
+        else:
+            JOURNAL.discard(key)
+            get_portfolio().release(key)
+    
+    if chat_id:
+        telegram_send(chat_id, text, done)
+    else:
+        done(False)
+
+@METRICS.timed("format")
+def format_signal(pair_name, signal, details, lot_size, strategy_name, entry=None, sl=None, tp=None, interval=INTERVAL, pip_size=None):
+    msg = f"💱 {pair_name} {interval}\n\n"
     msg += f"📊 Signal: {signal}\n"
     msg += f"🎯 Strategy: {strategy_name}\n\n"
     msg += f"{details}\n\n"
     msg += f"💰 Position Size:\n"
     msg += f"Lot Size: {lot_size}\n"
     
+    stop_pips, target_pips = STOP_LOSS_PIPS, TAKE_PROFIT_PIPS
+    if entry and sl and tp and pip_size:
+        stop_pips = round(abs(entry - sl) / pip_size, 1)
+        target_pips = round(abs(tp - entry) / pip_size, 1)
+    
     if entry and sl and tp:
         msg += f"Entry: {entry:.5f}\n"
-        msg += f"Stop Loss: {sl:.5f} ({STOP_LOSS_PIPS} pips)\n"
-        msg += f"Take Profit: {tp:.5f} ({TAKE_PROFIT_PIPS} pips)\n"
+        msg += f"Stop Loss: {sl:.5f} ({stop_pips:g} pips)\n"
+        msg += f"Take Profit: {tp:.5f} ({target_pips:g} pips)\n"
     else:
-        msg += f"Stop Loss: {STOP_LOSS_PIPS} pips\n"
-        msg += f"Take Profit: {TAKE_PROFIT_PIPS} pips\n"
+        msg += f"Stop Loss: {stop_pips:g} pips\n"
+        msg += f"Take Profit: {target_pips:g} pips\n"
     
-    msg += f"Risk:Reward = 1:{TAKE_PROFIT_PIPS/STOP_LOSS_PIPS:.1f}\n"
+    msg += f"Risk:Reward = 1:{target_pips/stop_pips:.1f}\n"
     msg += f"Risk: {RISK_PERCENT}% (${ACCOUNT_BALANCE * RISK_PERCENT / 100:.2f})"
-    bot.send_message(chat_id=chat_id, text=msg)
+    return msg
+
+def submit_coalesced(key, func, *args):
+    with INFLIGHT_LOCK:
+        future = INFLIGHT_SIGNALS.get(key)
+        if future is not None:
+            METRICS.incr("commands_coalesced")
+            return future
+        future = COMMAND_POOL.submit(func, *args)
+        INFLIGHT_SIGNALS[key] = future
+    
+    future.add_done_callback(lambda f: forget_signal(key, f))
+    return future
+
+def submit_signal(pair_symbol, pip_value, pip_size, strategy_type="BOTH"):
+    key = (pair_symbol, strategy_type, next_bar_close(PROVIDER.now(), INTERVAL))
+    return submit_coalesced(key, get_signal, pair_symbol, pip_value, pip_size, strategy_type)
+
+def forget_signal(key, future):
+    with INFLIGHT_LOCK:
+        if INFLIGHT_SIGNALS.get(key) is future:
+            del INFLIGHT_SIGNALS[key]
+
+def reply_signal(update, pair_name, pip_size, title, strategy_label, future):
+    try:
+        signal, details, lot_size, entry, sl, tp, strategy_name = future.result()
+        
+        if signal and signal != "HOLD":
+            update.message.reply_text(format_signal(pair_name, signal, details, lot_size, strategy_label or strategy_name, entry, sl, tp, pip_size=pip_size))
+        elif signal == "HOLD":
+            update.message.reply_text(f"📊 {title}\n\n{details}")
+        else:
+            update.message.reply_text(f"❌ Error: {details}")
+    except Exception as e:
+        print(f"Reply error for {pair_name}: {e}")
+
+def analyze_command(update, pair_key, strategy_type, title, strategy_label=None):
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    future = submit_signal(pair_symbol, pip_value, pip_size, strategy_type)
+    future.add_done_callback(lambda f: reply_signal(update, pair_name, pip_size, title, strategy_label, f))
+
+def scan_pair(pair_key, interval=INTERVAL):
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    price, all_signals = get_all_strategy_signals(pair_symbol, pip_value, pip_size, interval)
+    buys = len([s for s in all_signals if s[1] == "BUY"])
+    sells = len([s for s in all_signals if s[1] == "SELL"])
+    return pair_name, price, buys, sells
+
+def scan_pairs(interval=INTERVAL):
+    try:
+        prefetch_bars([pair_symbol for pair_symbol, _, _, _ in PAIRS.values()], interval)
+    except Exception as e:
+        print(f"Batch download error: {e}")
+    
+    futures = [MONITOR_POOL.submit(scan_pair, pair_key, interval) for pair_key in PAIRS]
+    rows = [future.result() for future in futures]
+    rows.sort(key=lambda row: (max(row[2], row[3]), abs(row[2] - row[3])), reverse=True)
+    return rows
+
+def format_scan(rows, interval=INTERVAL):
+    msg = f"🔎 SCAN {interval} - {len(rows)} pairs x {len(ALL_STRATEGIES)} strategies\n\n"
+    for i, (pair_name, price, buys, sells) in enumerate(rows, 1):
+        if price is None:
+            msg += f"{i}. {pair_name}: no data\n"
+            continue
+        
+        if buys > sells:
+            bias = "🟢 BUY"
+        elif sells > buys:
+            bias = "🔴 SELL"
+        else:
+            bias = "⚪ FLAT"
+        fire = " 🔥" if max(buys, sells) >= SURE_SHOT_MIN_STRATEGIES else ""
+        msg += f"{i}. {pair_name} {bias} | B {buys} / S {sells} | {price:.5f}{fire}\n"
+    msg += f"\n🔥 = {SURE_SHOT_MIN_STRATEGIES}+ strategies agree"
+    return msg
+
+def reply_scan(update, future):
+    try:
+        update.message.reply_text(format_scan(future.result()))
+    except Exception as e:
+        print(f"Scan reply error: {e}")
+        update.message.reply_text(f"❌ Error: {e}")
+
+def scan_command(update: Update, context: CallbackContext):
+    update.message.reply_text(f"⏳ Scanning {len(PAIRS)} pairs with all {len(ALL_STRATEGIES)} strategies...")
+    future = submit_coalesced(("scan", INTERVAL, next_bar_close(PROVIDER.now(), INTERVAL)), scan_pairs)
+    future.add_done_callback(lambda f: reply_scan(update, f))
+
+def stats_command(update: Update, context: CallbackContext):
+    if not SIGNAL_JOURNAL:
+        update.message.reply_text("📒 Signal journal is disabled (set SIGNAL_JOURNAL to enable)")
+        return
+    
+    rows = JOURNAL.stats()
+    if not rows:
+        update.message.reply_text("📒 No signals recorded yet")
+        return
+    
+    msg = f"📒 SIGNAL JOURNAL\n\n"
+    for name, total, wins, losses, pending in rows:
+        closed = wins + losses
+        rate = f"{wins / closed * 100:.0f}%" if closed else "-"
+        msg += f"{name}: {rate} TP ({wins}/{closed}) | {pending} open | {total} total\n"
+    update.message.reply_text(msg)
 
 def start_command(update: Update, context: CallbackContext):
     pairs_list = "\n".join([f"/{key}" for key, value in PAIRS.items()])
@@ -398,7 +2198,10 @@ def start_command(update: Update, context: CallbackContext):
     message += f"6️⃣ Range Trading\n"
     message += f"7️⃣ Pullback Strategy\n\n"
     message += f"💰 Account: ${ACCOUNT_BALANCE}\n"
-    message += f"📉 Risk: {RISK_PERCENT}% | SL: {STOP_LOSS_PIPS} pips | TP: {TAKE_PROFIT_PIPS} pips\n\n"
+    if RISK_MODE == "atr":
+        message += f"📉 Risk: {RISK_PERCENT}% | SL: {ATR_SL_MULTIPLIER:g}x ATR | TP: {ATR_TP_MULTIPLIER:g}x ATR\n\n"
+    else:
+        message += f"📉 Risk: {RISK_PERCENT}% | SL: {STOP_LOSS_PIPS} pips | TP: {TAKE_PROFIT_PIPS} pips\n\n"
     message += f"📌 COMMANDS:\n\n"
     message += f"▪️ /[pair] - Both EMA+RSI & Breakout\n"
     message += f"   Example: /eurusd\n\n"
@@ -408,240 +2211,196 @@ def start_command(update: Update, context: CallbackContext):
     message += f"▪️ /f_[pair] - Fibonacci\n"
     message += f"▪️ /p_[pair] - Price Action\n"
     message += f"▪️ /r_[pair] - Range Trading\n"
-    message += f"▪️ /pb_[pair] - Pullback\n\n"
+    message += f"▪️ /pb_[pair] - Pullback\n"
+    message += f"▪️ /scan - Rank all pairs by strategy agreement\n"
+    message += f"▪️ /stats - Hit rates of past signals\n\n"
     message += f"📋 Available pairs:\n{pairs_list}"
     update.message.reply_text(message)
 
-def pair_command(update: Update, context: CallbackContext):
-    command = update.message.text[1:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
+def strategy_command(update, pair_key, strategy_type):
+    pair_name = PAIRS[pair_key][1]
+    if strategy_type == "BOTH":
+        update.message.reply_text(f"⏳ Analyzing {pair_name} with BOTH strategies...")
+        analyze_command(update, pair_key, "BOTH", pair_name)
         return
     
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with BOTH strategies...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "BOTH")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, strategy_name, update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name}\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
-
-def breakout_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
-    
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with BREAKOUT strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "BREAKOUT")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "Breakout", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - Breakout Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+    strategy_name = STRATEGY_REGISTRY[strategy_type][0]
+    update.message.reply_text(f"⏳ Analyzing {pair_name} with {strategy_name.upper()} strategy...")
+    analyze_command(update, pair_key, strategy_type, f"{pair_name} - {strategy_name} Strategy", strategy_name)
 
-def ema_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
-    
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with EMA+RSI strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "EMA_RSI")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "EMA+RSI", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - EMA+RSI Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
-
-def ma_crossover_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
-    
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with MA CROSSOVER strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "MA_CROSSOVER")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "MA Crossover", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - MA Crossover Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+COMMAND_HANDLERS = {
+    "start": start_command,
+    "scan": scan_command,
+    "stats": stats_command
+}
 
-def fibonacci_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
+def command_router(update: Update, context: CallbackContext):
+    command = update.message.text.split()[0][1:].split("@")[0].lower()
     
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
+    handler = COMMAND_HANDLERS.get(command)
+    if handler is not None:
+        handler(update, context)
         return
     
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with FIBONACCI strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "FIBONACCI")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "Fibonacci", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - Fibonacci Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+    route = PAIR_COMMANDS.get(command)
+    if route is not None:
+        strategy_command(update, *route)
 
-def price_action_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
-    
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with PRICE ACTION strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "PRICE_ACTION")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "Price Action", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - Price Action Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+def monitor_pair(pair_key, interval=INTERVAL):
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    try:
+        sure_shot_msg = check_sure_shot_signal(pair_symbol, pair_name, pip_value, pip_size, interval, CHANNEL_ID)
+        if sure_shot_msg and CHANNEL_ID:
+            print(f"🔥 SURE SHOT: {pair_name} - Broadcasted to channel!")
+        elif sure_shot_msg:
+            print(f"🔥 SURE SHOT: {pair_name} - (Channel not configured)")
+        
+        signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, STRATEGY_MODE, interval)
+        if signal in ["BUY", "SELL"] and CHAT_ID:
+            key = (pair_symbol, interval, last_bar_time(pair_symbol, interval), signal, "SIGNAL")
+            if not JOURNAL.record(*key, strategy_name, entry, sl, tp):
+                return
+            
+            lot_size, portfolio_risk = get_portfolio().allocate(key, entry, sl, tp, lot_size, pip_value, pip_size, abs(entry - sl) / pip_size)
+            if not lot_size:
+                JOURNAL.discard(key)
+                print(f"🛡️ {pair_name} {interval}: {signal} suppressed by portfolio risk budget")
+                return
+            
+            msg = format_signal(pair_name, signal, details, lot_size, strategy_name, entry, sl, tp, interval, pip_size)
+            if PORTFOLIO_RISK_PERCENT > 0:
+                msg += f"\n🛡️ Portfolio Risk: ${portfolio_risk:.2f} / ${get_portfolio().budget():.2f}"
+            publish_signal(CHAT_ID, msg, key, lot_size)
+            print(f"{pair_name} {interval}: {signal} [{strategy_name}] @ {entry} | SL: {sl} | TP: {tp} | Lot: {lot_size}")
+    except Exception as e:
+        METRICS.incr("monitor_errors", pair=pair_key)
+        print(f"Error with {pair_name}: {e}")
 
-def range_trading_command(update: Update, context: CallbackContext):
-    command = update.message.text[3:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
-    
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with RANGE TRADING strategy...")
-    
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "RANGE_TRADING")
-    
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "Range Trading", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - Range Trading Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+def last_bar_close(pair_symbol, interval):
+    data = get_bars(pair_symbol, interval)
+    return data.index[-1].timestamp() + interval_seconds(interval) if not data.empty else None
 
-def pullback_command(update: Update, context: CallbackContext):
-    command = update.message.text[4:].lower()
-    
-    if command not in PAIRS:
-        update.message.reply_text(f"❌ Unknown pair: {command}\n\nUse /start to see available pairs")
-        return
+def evaluate_bar_close(interval, bar_close, pair_keys):
+    try:
+        prefetch_bars([PAIRS[pair_key][0] for pair_key in pair_keys], interval)
+    except Exception as e:
+        print(f"Batch download error: {e}")
     
-    pair_symbol, pair_name, pip_value, pip_size = PAIRS[command]
-    update.message.reply_text(f"⏳ Analyzing {pair_name} with PULLBACK strategy...")
+    arrived = []
+    stragglers = []
+    for pair_key in pair_keys:
+        try:
+            closed = last_bar_close(PAIRS[pair_key][0], interval)
+            if closed is None or closed <= bar_close - interval_seconds(interval):
+                stragglers.append(pair_key)
+            elif closed <= bar_close:
+                arrived.append(pair_key)
+            else:
+                METRICS.incr("bars_superseded", interval=interval)
+        except Exception as e:
+            print(f"Error fetching {PAIRS[pair_key][1]} ({interval}): {e}")
+            stragglers.append(pair_key)
     
-    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, "PULLBACK")
+    if interval == CORRELATION_INTERVAL:
+        try:
+            get_portfolio().observe({PAIRS[pair_key][0]: get_bars(PAIRS[pair_key][0], interval) for pair_key in arrived})
+        except Exception as e:
+            print(f"Portfolio update error: {e}")
     
-    if signal and signal != "HOLD":
-        send_signal(pair_name, signal, details, lot_size, "Pullback", update.message.chat_id, entry, sl, tp)
-    elif signal == "HOLD":
-        update.message.reply_text(f"📊 {pair_name} - Pullback Strategy\n\n{details}")
-    else:
-        update.message.reply_text(f"❌ Error: {details}")
+    for future in [MONITOR_POOL.submit(monitor_pair, pair_key, interval) for pair_key in arrived]:
+        future.result()
+    return arrived, stragglers
 
 def background_monitor():
-    print(f"Background monitor started... checking {len(PAIRS)} pairs every 15 minutes.")
+    print(f"Background monitor started... checking {len(PAIRS)} pairs on each {', '.join(MONITOR_INTERVALS)} bar close with {MONITOR_WORKERS} workers.")
     print(f"Strategy Mode: {STRATEGY_MODE}")
     print(f"🔥 SURE SHOT SIGNALS: Active (broadcasts when {SURE_SHOT_MIN_STRATEGIES}+ strategies agree)")
     if CHANNEL_ID:
         print(f"📢 Channel Broadcast: ENABLED (ID: {CHANNEL_ID})")
     else:
         print(f"📢 Channel Broadcast: DISABLED (set TELEGRAM_CHANNEL_ID to enable)")
+    if SIGNAL_JOURNAL:
+        JOURNAL.start()
+        print(f"📒 Signal Journal: {SIGNAL_JOURNAL} (duplicate alerts suppressed, outcomes resolved every {JOURNAL_RESOLVE_INTERVAL:.0f}s)")
+    if PORTFOLIO_RISK_PERCENT > 0:
+        print(f"🛡️ Portfolio Risk Budget: {PORTFOLIO_RISK_PERCENT}% across open positions ({CORRELATION_WINDOW} x {CORRELATION_INTERVAL} bar correlation)")
+    
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    
+    timers = []
+    now = PROVIDER.now()
+    for interval in MONITOR_INTERVALS:
+        last_close = next_bar_close(now, interval) - interval_seconds(interval)
+        heapq.heappush(timers, (now, interval, last_close, 0, list(PAIRS)))
     
     while True:
+        due, interval, bar_close, attempt, pair_keys = heapq.heappop(timers)
+        wait = due - PROVIDER.now()
+        if wait > 0:
+            PROVIDER.sleep(wait)
+        
+        if attempt == 0:
+            latest_close = next_bar_close(PROVIDER.now() - BAR_SETTLE_SECONDS, interval) - interval_seconds(interval)
+            if latest_close > bar_close:
+                skipped = int((latest_close - bar_close) // interval_seconds(interval))
+                METRICS.incr("bar_closes_skipped", skipped, interval=interval)
+                print(f"{interval} sweep overran: skipping {skipped} bar close(s), evaluating the latest")
+                bar_close = latest_close
+            next_close = bar_close + interval_seconds(interval)
+            heapq.heappush(timers, (next_close + BAR_SETTLE_SECONDS, interval, next_close, 0, list(PAIRS)))
+        
         try:
-            for pair_key, (pair_symbol, pair_name, pip_value, pip_size) in PAIRS.items():
-                try:
-                    sure_shot_msg = check_sure_shot_signal(pair_symbol, pair_name, pip_value, pip_size)
-                    if sure_shot_msg and CHANNEL_ID:
-                        bot.send_message(chat_id=CHANNEL_ID, text=sure_shot_msg)
-                        print(f"🔥 SURE SHOT: {pair_name} - Broadcasted to channel!")
-                    elif sure_shot_msg:
-                        print(f"🔥 SURE SHOT: {pair_name} - (Channel not configured)")
-                    
-                    signal, details, lot_size, entry, sl, tp, strategy_name = get_signal(pair_symbol, pip_value, pip_size, STRATEGY_MODE)
-                    if signal in ["BUY", "SELL"] and CHAT_ID:
-                        send_signal(pair_name, signal, details, lot_size, strategy_name, CHAT_ID, entry, sl, tp)
-                        print(f"{pair_name}: {signal} [{strategy_name}] @ {entry} | SL: {sl} | TP: {tp} | Lot: {lot_size}")
-                    
-                    time.sleep(2)
-                except Exception as e:
-                    print(f"Error with {pair_name}: {e}")
-            
-            time.sleep(CHECK_INTERVAL)
+            sweep_start = time.time()
+            arrived, stragglers = evaluate_bar_close(interval, bar_close, pair_keys)
+            elapsed = time.time() - sweep_start
+            METRICS.observe("sweep", elapsed, interval=interval)
+            METRICS.gauge("sweep_budget_ratio", elapsed / interval_seconds(interval), interval=interval)
+            METRICS.incr("pairs_evaluated", len(arrived), interval=interval)
+            METRICS.incr("stragglers", len(stragglers), interval=interval)
+            print(f"{interval} bar close: {len(arrived)}/{len(pair_keys)} pairs evaluated in {elapsed:.1f}s")
         except Exception as e:
             print(f"Background monitor error: {e}")
-            time.sleep(60)
+            stragglers = []
+        
+        if stragglers and attempt < STRAGGLER_RETRIES:
+            expire_bars([PAIRS[pair_key][0] for pair_key in stragglers], interval)
+            retry_at = PROVIDER.now() + STRAGGLER_BACKOFF * 2 ** attempt
+            heapq.heappush(timers, (retry_at, interval, bar_close, attempt + 1, stragglers))
+        elif stragglers:
+            print(f"No new {interval} bar for {', '.join(stragglers)} after {STRAGGLER_RETRIES} retries")
 
 def main():
     updater = Updater(token=TOKEN, use_context=True)
     dispatcher = updater.dispatcher
     
-    dispatcher.add_handler(CommandHandler("start", start_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(pair_key, pair_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"b_{pair_key}", breakout_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"e_{pair_key}", ema_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"m_{pair_key}", ma_crossover_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"f_{pair_key}", fibonacci_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"p_{pair_key}", price_action_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"r_{pair_key}", range_trading_command))
-    
-    for pair_key in PAIRS.keys():
-        dispatcher.add_handler(CommandHandler(f"pb_{pair_key}", pullback_command))
+    dispatcher.add_handler(CommandHandler(list(COMMAND_HANDLERS) + list(PAIR_COMMANDS), command_router))
     
+    start_metrics()
     monitor_thread = threading.Thread(target=background_monitor, daemon=True)
     monitor_thread.start()
     
-    print("✅ Bot Started!")
-    print(f"Monitoring {len(PAIRS)} pairs every {CHECK_INTERVAL} seconds")
+    METRICS.gauge("startup_seconds", time.time() - PROCESS_STARTED)
+    print(f"✅ Bot Started in {time.time() - PROCESS_STARTED:.2f}s!")
+    print(f"Monitoring {len(PAIRS)} pairs on each {', '.join(MONITOR_INTERVALS)} bar close")
     print(f"Account Balance: ${ACCOUNT_BALANCE}")
     print(f"Risk Per Trade: {RISK_PERCENT}%")
-    print(f"Stop Loss: {STOP_LOSS_PIPS} pips | Take Profit: {TAKE_PROFIT_PIPS} pips")
+    print(f"Portfolio Risk Budget: {PORTFOLIO_RISK_PERCENT}%")
+    if RISK_MODE == "atr":
+        print(f"Stop Loss: {ATR_SL_MULTIPLIER:g}x ATR{ATR_LENGTH} | Take Profit: {ATR_TP_MULTIPLIER:g}x ATR{ATR_LENGTH}")
+    else:
+        print(f"Stop Loss: {STOP_LOSS_PIPS} pips | Take Profit: {TAKE_PROFIT_PIPS} pips")
     print(f"Strategy Mode: {STRATEGY_MODE}")
     
     updater.start_polling()
     updater.idle()
 
 if __name__ == "__main__":
+    if TELEGRAM_DRY_RUN:
+        start_metrics()
+        print(f"🧪 Dry run: signals are printed instead of sent (provider: {DATA_PROVIDER})")
+        background_monitor()
+        exit(0)
+    
     if not TOKEN or not CHAT_ID:
         print("❌ ERROR: Missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID environment variables!")
         print("Please set them in the Secrets tab:")
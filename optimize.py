@@ -0,0 +1,180 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from main import PAIRS, INTERVAL, Indicators, read_bar_file, find_bar_file
+from backtest import (
+    DEFAULT_PARAMS, SURE_SHOT, STRATEGY_RULES,
+    strategy_rule, compute_exits, simulate_trades
+)
+
+DEFAULT_GRID = {
+    "rsi_buy": [35, 40, 45],
+    "rsi_sell": [55, 60, 65],
+    "bb_length": [20, 30],
+    "bb_std": [2, 2.5],
+    "fib_buy": [0.5, 0.618, 0.786],
+    "fib_sell": [0.236, 0.382],
+    "range_zone": [0.1, 0.2, 0.3],
+    "min_strategies": [2, 3, 4],
+    "stop_loss_pips": [30, 50, 80],
+    "take_profit_pips": [60, 100, 150]
+}
+
+EXIT_PARAMS = ("stop_loss_pips", "take_profit_pips")
+RANK_COLUMNS = ("expectancy", "total_pnl", "win_rate", "profit_factor")
+
+WORKER_BARS = {}
+
+def parse_grid_overrides(overrides):
+    grid = dict(DEFAULT_GRID)
+    for override in overrides or []:
+        name, _, values = override.partition("=")
+        if name not in DEFAULT_PARAMS:
+            raise SystemExit(f"Unknown parameter: {name}")
+        grid[name] = [float(v) if "." in v else int(v) for v in values.split(",")]
+    return grid
+
+def build_combinations(grid, search, samples, seed):
+    names = list(grid)
+    if search == "grid":
+        combinations = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    else:
+        rng = random.Random(seed)
+        seen = set()
+        combinations = []
+        total = int(np.prod([len(grid[n]) for n in names]))
+        while len(combinations) < min(samples, total):
+            values = tuple(rng.choice(grid[n]) for n in names)
+            if values not in seen:
+                seen.add(values)
+                combinations.append(dict(zip(names, values)))
+    
+    combinations.sort(key=lambda p: (p["bb_length"], p["bb_std"], p["stop_loss_pips"], p["take_profit_pips"]))
+    return combinations
+
+def load_worker_bars(pair_key, path):
+    if pair_key not in WORKER_BARS:
+        data = read_bar_file(path)
+        WORKER_BARS[pair_key] = (data, Indicators(data))
+    return WORKER_BARS[pair_key]
+
+def evaluate_chunk(task):
+    pair_key, path, strategy_type, chunk = task
+    pair_symbol, pair_name, pip_value, pip_size = PAIRS[pair_key]
+    data, ind = load_worker_bars(pair_key, path)
+    strategy_name, rule = strategy_rule(strategy_type)
+    
+    exits_cache = {}
+    signals_cache = {}
+    results = []
+    for combo_id, params in chunk:
+        exit_key = tuple(params[n] for n in EXIT_PARAMS)
+        if exit_key not in exits_cache:
+            exits_cache[exit_key] = compute_exits(data, pip_size, *exit_key)
+        
+        signal_key = tuple((n, v) for n, v in params.items() if n not in EXIT_PARAMS)
+        if signal_key not in signals_cache:
+            signals_cache[signal_key] = rule(ind, params)
+        
+        buy, sell = signals_cache[signal_key]
+        trades = simulate_trades(data, buy, sell, pip_value, pip_size, exits=exits_cache[exit_key])
+        closed = trades[trades["outcome"] != "OPEN"]
+        equity = np.concatenate([[0.0], trades["pnl"].cumsum().to_numpy()])
+        results.append({
+            "combo": combo_id,
+            "pair": pair_key,
+            "trades": len(trades),
+            "closed": len(closed),
+            "wins": int((closed["outcome"] == "WIN").sum()),
+            "gross_profit": float(trades["pnl"].clip(lower=0).sum()),
+            "gross_loss": float(-trades["pnl"].clip(upper=0).sum()),
+            "total_pnl": float(trades["pnl"].sum()),
+            "max_drawdown": float((np.maximum.accumulate(equity) - equity).max())
+        })
+    return results
+
+def rank_results(rows, combinations, rank_by, min_trades):
+    per_pair = pd.DataFrame(rows)
+    totals = per_pair.groupby("combo").agg(
+        trades=("trades", "sum"),
+        closed=("closed", "sum"),
+        wins=("wins", "sum"),
+        gross_profit=("gross_profit", "sum"),
+        gross_loss=("gross_loss", "sum"),
+        total_pnl=("total_pnl", "sum"),
+        max_drawdown=("max_drawdown", "max")
+    )
+    totals["win_rate"] = totals["wins"] / totals["closed"].where(totals["closed"] > 0) * 100
+    totals["expectancy"] = totals["total_pnl"] / totals["trades"].where(totals["trades"] > 0)
+    totals["profit_factor"] = totals["gross_profit"] / totals["gross_loss"].where(totals["gross_loss"] > 0)
+    
+    table = pd.DataFrame(combinations).join(totals[["trades", "win_rate", "expectancy", "profit_factor", "total_pnl", "max_drawdown"]])
+    table = table[table["trades"] >= min_trades]
+    return table.sort_values(rank_by, ascending=False).reset_index(drop=True)
+
+def run_optimizer(data_dir, pair_keys, strategy_type, combinations, workers, interval=INTERVAL):
+    paths = {}
+    for pair_key in pair_keys:
+        path = find_bar_file(data_dir, PAIRS[pair_key][0], interval)
+        if path is None:
+            print(f"No bar file for {pair_key} in {data_dir}, skipping")
+        else:
+            paths[pair_key] = path
+    
+    indexed = list(enumerate(combinations))
+    chunks_per_pair = -(-workers * 4 // max(1, len(paths)))
+    chunk_size = max(1, -(-len(indexed) // chunks_per_pair))
+    tasks = [
+        (pair_key, path, strategy_type, indexed[i:i + chunk_size])
+        for pair_key, path in paths.items()
+        for i in range(0, len(indexed), chunk_size)
+    ]
+    
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(evaluate_chunk, tasks):
+            rows.extend(results)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy thresholds and SL/TP over local OHLCV files")
+    parser.add_argument("data_dir", help="directory with one CSV/Parquet file per pair (same layout as backtest.py)")
+    parser.add_argument("--pairs", nargs="+", choices=list(PAIRS), help="pairs to include (default: all)")
+    parser.add_argument("--strategy", default=SURE_SHOT, choices=list(STRATEGY_RULES) + [SURE_SHOT])
+    parser.add_argument("--search", default="random", choices=["random", "grid"])
+    parser.add_argument("--samples", type=int, default=200, help="combinations to draw in random search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="overrides", action="append", metavar="NAME=V1,V2", help="override the values swept for one parameter")
+    parser.add_argument("--rank", default="expectancy", choices=RANK_COLUMNS)
+    parser.add_argument("--min-trades", type=int, default=30)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--interval", default=INTERVAL)
+    parser.add_argument("--output", help="write the full ranked table to this CSV file")
+    args = parser.parse_args()
+    
+    grid = parse_grid_overrides(args.overrides)
+    combinations = build_combinations(grid, args.search, args.samples, args.seed)
+    print(f"Evaluating {len(combinations)} combinations of {args.strategy} on {args.workers} workers...")
+    
+    started = time.time()
+    rows = run_optimizer(args.data_dir, args.pairs or list(PAIRS), args.strategy, combinations, args.workers, args.interval)
+    if not rows:
+        print("No results")
+        return
+    
+    table = rank_results(rows, combinations, args.rank, args.min_trades)
+    print(table.head(args.top).to_string(float_format=lambda v: f"{v:.2f}"))
+    print(f"\nOptimization finished in {time.time() - started:.1f}s")
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
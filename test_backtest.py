@@ -0,0 +1,13 @@
+from benchmark import synthetic_bars
+from backtest import DEFAULT_PARAMS, fibonacci_rule
+from main import Indicators
+
+def test_fibonacci_rule_uses_level_params():
+    ind = Indicators(synthetic_bars(2000, seed=1))
+    buy, sell = fibonacci_rule(ind)
+    wide_buy, wide_sell = fibonacci_rule(ind, {**DEFAULT_PARAMS, "fib_buy": 0.786, "fib_sell": 0.382})
+    
+    assert not buy.equals(wide_buy)
+    assert not sell.equals(wide_sell)
+    assert wide_buy.sum() < buy.sum()
+    assert wide_sell.sum() > sell.sum()
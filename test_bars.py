@@ -0,0 +1,66 @@
+import os
+
+import main
+from benchmark import synthetic_bars
+from main import BAR_HISTORY_LIMIT, interval_seconds, load_stored_bars, merge_bars, refresh_bars, save_stored_bars
+
+class FakeProvider:
+    def __init__(self, data, now, skip=0):
+        self.data = data
+        self.time = now
+        self.skip = skip
+    
+    def now(self):
+        return self.time
+    
+    def fetch(self, pair_symbol, interval, period, start=None):
+        if start is None:
+            return self.data
+        return self.data[self.data.index >= start].iloc[self.skip:]
+
+def bar_close(data, i):
+    return data.index[i].timestamp() + interval_seconds("15m")
+
+def test_merge_bars_replaces_the_overlap_and_trims():
+    data = synthetic_bars(1000)
+    merged = merge_bars(data.iloc[:600], data.iloc[599:700])
+    
+    assert merged.equals(data.iloc[700 - BAR_HISTORY_LIMIT:700])
+
+def test_merge_bars_reports_a_gap():
+    data = synthetic_bars(1000)
+    
+    assert merge_bars(data.iloc[:600], data.iloc[650:700]) is None
+
+def test_merge_bars_trims_when_nothing_is_new():
+    data = synthetic_bars(2000)
+    
+    assert merge_bars(data, data.iloc[0:0]).equals(data.tail(BAR_HISTORY_LIMIT))
+
+def test_refresh_bars_appends_new_bars(monkeypatch):
+    data = synthetic_bars(1000)
+    monkeypatch.setattr(main, "PROVIDER", FakeProvider(data, bar_close(data, 799)))
+    
+    assert refresh_bars("X", "15m", data.iloc[:700]).equals(data.iloc[800 - BAR_HISTORY_LIMIT:800])
+
+def test_refresh_bars_resyncs_after_a_gap(monkeypatch):
+    data = synthetic_bars(1000)
+    monkeypatch.setattr(main, "PROVIDER", FakeProvider(data, bar_close(data, 799), skip=5))
+    
+    assert refresh_bars("X", "15m", data.iloc[:700]).equals(data.iloc[800 - BAR_HISTORY_LIMIT:800])
+
+def test_bar_store_round_trip_appends_only_new_rows(monkeypatch, tmp_path):
+    data = synthetic_bars(1200)
+    monkeypatch.setattr(main, "BAR_STORE_DIR", str(tmp_path))
+    
+    save_stored_bars("X", "15m", data.iloc[:800])
+    path = main.bar_store_path("X", "15m")
+    written = os.stat(path).st_mtime_ns
+    save_stored_bars("X", "15m", data.iloc[300:800])
+    assert os.stat(path).st_mtime_ns == written
+    
+    save_stored_bars("X", "15m", data.iloc[600:1200])
+    stored = load_stored_bars("X", "15m")
+    
+    assert stored.index.equals(data.index)
+    assert (stored[["Open", "High", "Low", "Close"]].to_numpy() == data[["Open", "High", "Low", "Close"]].to_numpy()).all()
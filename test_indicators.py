@@ -0,0 +1,26 @@
+import math
+
+from benchmark import synthetic_bars
+from main import ALL_STRATEGY_INDICATORS, BAR_HISTORY_LIMIT, STREAM_CACHE, BarArrays, Indicators, StreamingIndicators, stream_indicators
+
+TOLERANCE = 1e-12
+
+def assert_matches(expected, actual, depth=3):
+    for key in ALL_STRATEGY_INDICATORS:
+        for ago in range(depth):
+            want = expected.value(*key, ago=ago)
+            got = actual.value(*key, ago=ago)
+            assert math.isclose(got, want, rel_tol=TOLERANCE), (key, ago, got, want)
+
+def test_engines_match_pandas_ta_on_the_trimmed_window():
+    full = synthetic_bars(1500, seed=3)
+    STREAM_CACHE.clear()
+    
+    for end in range(BAR_HISTORY_LIMIT + 1, len(full) + 1):
+        data = full.iloc[:end].tail(BAR_HISTORY_LIMIT)
+        stream = stream_indicators("TEST", data)
+        if end % 250 == 0:
+            expected = Indicators(data).compute(ALL_STRATEGY_INDICATORS)
+            assert_matches(expected, stream)
+            assert_matches(expected, BarArrays.from_frame(data).compute(ALL_STRATEGY_INDICATORS))
+            assert_matches(expected, StreamingIndicators(ALL_STRATEGY_INDICATORS).update_frame(data))
@@ -0,0 +1,57 @@
+import pandas as pd
+
+import main
+from main import SignalJournal
+
+def bars():
+    index = pd.date_range("2024-01-01", periods=6, freq="15min", tz="UTC")
+    return pd.DataFrame({
+        "Open": [1.10, 1.10, 1.10, 1.10, 1.10, 1.10],
+        "High": [1.101, 1.102, 1.103, 1.112, 1.104, 1.103],
+        "Low": [1.099, 1.098, 1.097, 1.096, 1.089, 1.097],
+        "Close": [1.10, 1.10, 1.10, 1.10, 1.10, 1.10]
+    }, index=index)
+
+def bar_time(data, i):
+    return int(data.index[i].timestamp())
+
+def test_record_is_the_dedupe_gate(tmp_path):
+    journal = SignalJournal(str(tmp_path / "signals.db"))
+    key = ("EURUSD=X", "15m", 100, "BUY", "SIGNAL")
+    
+    assert journal.record(*key, "EMA+RSI", 1.1, 1.095, 1.11)
+    assert not journal.record(*key, "EMA+RSI", 1.1, 1.095, 1.11)
+    
+    journal.discard(key)
+    assert journal.record(*key, "EMA+RSI", 1.1, 1.095, 1.11)
+    
+    journal.mark_sent(key, 4.0)
+    journal.discard(key)
+    assert not journal.record(*key, "EMA+RSI", 1.1, 1.095, 1.11)
+    assert SignalJournal(str(tmp_path / "signals.db")).stats() == [("EMA+RSI", 1, 0, 0, 1)]
+
+def test_resolve_marks_the_first_level_hit(tmp_path, monkeypatch):
+    data = bars()
+    monkeypatch.setattr(main, "get_bars", lambda pair_symbol, interval: data)
+    journal = SignalJournal(str(tmp_path / "signals.db"))
+    signals = [
+        ("BUY", bar_time(data, 0), 1.09, 1.11),
+        ("SELL", bar_time(data, 1), 1.11, 1.09),
+        ("BUY", bar_time(data, 0) - 900, 1.09, 1.11),
+        ("SELL", bar_time(data, 4), 1.12, 1.08)
+    ]
+    for signal, opened, sl, tp in signals:
+        key = ("EURUSD=X", "15m", opened, signal, "SIGNAL")
+        journal.record(*key, "Breakout", 1.1, sl, tp)
+        journal.mark_sent(key, 1.0)
+    journal.record("EURUSD=X", "15m", bar_time(data, 2), "BUY", "SIGNAL", "Breakout", 1.1, 1.09, 1.11)
+    
+    assert journal.resolve() == 3
+    outcomes = journal.connect().execute("SELECT signal, bar_time, outcome, resolved_bar FROM signals ORDER BY id").fetchall()
+    assert outcomes == [
+        ("BUY", bar_time(data, 0), "TP", bar_time(data, 3)),
+        ("SELL", bar_time(data, 1), "SL", bar_time(data, 3)),
+        ("BUY", bar_time(data, 0) - 900, "EXPIRED", None),
+        ("SELL", bar_time(data, 4), None, None),
+        ("BUY", bar_time(data, 2), None, None)
+    ]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import PortfolioRisk, calculate_lot_size
+
+PIP_VALUE = 10000
+PIP_SIZE = 0.0001
+LOT_SIZE = calculate_lot_size(PIP_VALUE, PIP_SIZE, 50)
+
+def allocate(portfolio, symbol, signal, bar_time):
+    return portfolio.allocate((symbol, "15m", bar_time, signal, "SIGNAL"), 1.1, 1.095, 1.11, LOT_SIZE, PIP_VALUE, PIP_SIZE, 50)
+
+def test_repeat_signals_on_one_pair_share_the_budget():
+    portfolio = PortfolioRisk(["EURUSD=X", "GBPUSD=X"], 50)
+    
+    assert allocate(portfolio, "EURUSD=X", "BUY", 1) == (4.0, 200.0)
+    assert allocate(portfolio, "EURUSD=X", "BUY", 2) == (4.0, 400.0)
+    assert allocate(portfolio, "EURUSD=X", "BUY", 3) == (2.0, 500.0)
+    assert allocate(portfolio, "EURUSD=X", "BUY", 4) == (0, 500.0)
+    assert len(portfolio.positions) == 3
+
+def test_release_frees_the_budget():
+    portfolio = PortfolioRisk(["EURUSD=X", "GBPUSD=X"], 50)
+    allocate(portfolio, "EURUSD=X", "BUY", 1)
+    allocate(portfolio, "EURUSD=X", "BUY", 2)
+    
+    portfolio.release(("EURUSD=X", "15m", 1, "BUY", "SIGNAL"))
+    
+    assert portfolio.total_risk() == 200.0
+    assert allocate(portfolio, "EURUSD=X", "BUY", 3) == (4.0, 400.0)
+
+def test_correlated_pairs_are_scaled_and_hedges_pass():
+    rng = np.random.default_rng(0)
+    base = np.exp(np.cumsum(rng.normal(0, 0.001, 60)))
+    closes = pd.DataFrame({"EURUSD=X": base, "GBPUSD=X": base * 1.2})
+    portfolio = PortfolioRisk(list(closes.columns), 50)
+    portfolio.seed(closes)
+    
+    allocate(portfolio, "EURUSD=X", "BUY", 1)
+    allocate(portfolio, "GBPUSD=X", "BUY", 1)
+    lot, risk = allocate(portfolio, "GBPUSD=X", "BUY", 2)
+    assert lot == 2.0
+    assert risk == pytest.approx(500.0)
+    
+    lot, risk = allocate(portfolio, "EURUSD=X", "SELL", 2)
+    assert lot == LOT_SIZE
+    assert risk < 500.0
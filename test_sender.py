@@ -0,0 +1,61 @@
+import time
+from collections import deque
+
+from telegram.error import BadRequest, NetworkError
+
+import main
+from main import MERGED_MESSAGE_SEPARATOR, TELEGRAM_MESSAGE_LIMIT, OutboundMessage, TelegramSender
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+    
+    def send_message(self, chat_id, text, **kwargs):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((chat_id, text))
+
+def ready(text, done=()):
+    return OutboundMessage(text, time.monotonic() - 1, done=done)
+
+def test_take_batch_merges_ready_messages():
+    queue = deque([ready("a"), ready("b"), OutboundMessage("later", time.monotonic() + 60)])
+    
+    batch = TelegramSender().take_batch(queue)
+    
+    assert [m.text for m in batch] == ["a", "b"]
+    assert [m.text for m in queue] == ["later"]
+
+def test_take_batch_respects_the_message_limit():
+    half = "x" * (TELEGRAM_MESSAGE_LIMIT // 2)
+    queue = deque([ready(half), ready(half), ready("tail")])
+    
+    batch = TelegramSender().take_batch(queue)
+    
+    assert len(batch) == 1
+    assert len(queue) == 2
+    assert len(MERGED_MESSAGE_SEPARATOR.join(m.text for m in TelegramSender().take_batch(queue))) <= TELEGRAM_MESSAGE_LIMIT
+
+def test_deliver_reports_sent_and_dropped(monkeypatch):
+    results = []
+    monkeypatch.setattr(main, "bot", FakeBot())
+    TelegramSender().deliver(1, [ready("a", [results.append]), ready("b", [results.append])])
+    assert main.bot.sent == [(1, "a" + MERGED_MESSAGE_SEPARATOR + "b")]
+    
+    monkeypatch.setattr(main, "bot", FakeBot(BadRequest("chat not found")))
+    TelegramSender().deliver(1, [ready("c", [results.append])])
+    
+    assert results == [True, True, False]
+
+def test_deliver_keeps_callbacks_on_retry(monkeypatch):
+    results = []
+    sender = TelegramSender()
+    monkeypatch.setattr(main, "bot", FakeBot(NetworkError("timeout")))
+    
+    sender.deliver(1, [ready("a", [results.append])])
+    
+    retry = sender.queues[1][0]
+    assert results == []
+    assert retry.attempts == 1
+    assert retry.done == [results.append]
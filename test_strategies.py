@@ -0,0 +1,30 @@
+from benchmark import synthetic_bars
+from main import ALL_STRATEGIES, BAR_HISTORY_LIMIT, BarArrays, Indicators
+
+def engulfing_bars(n, seed, every=41):
+    data = synthetic_bars(n, seed=seed)
+    open_, high, low, close = (data[c].to_numpy().copy() for c in ("Open", "High", "Low", "Close"))
+    for i in range(every, n, every):
+        reach = 2 * (high[i - 1] - low[i - 1])
+        bullish = (i // every) % 2
+        open_[i] = low[i - 1] - reach if bullish else high[i - 1] + reach
+        close[i] = high[i - 1] + reach if bullish else low[i - 1] - reach
+        high[i] = max(open_[i], close[i])
+        low[i] = min(open_[i], close[i])
+    return data.assign(Open=open_, High=high, Low=low, Close=close)
+
+def test_numpy_engine_gives_identical_strategy_signals():
+    full = engulfing_bars(3000, seed=7)
+    fired = set()
+    
+    for end in range(BAR_HISTORY_LIMIT, len(full) + 1, 5):
+        data = full.iloc[:end].tail(BAR_HISTORY_LIMIT)
+        pandas_ind = Indicators(data)
+        numpy_ind = BarArrays.from_frame(data)
+        for strategy_name, strategy in ALL_STRATEGIES:
+            expected = strategy(pandas_ind)
+            assert strategy(numpy_ind) == expected, (strategy_name, end)
+            if expected[0] != "HOLD":
+                fired.add(strategy_name)
+    
+    assert fired == {strategy_name for strategy_name, _ in ALL_STRATEGIES}